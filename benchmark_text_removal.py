@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Benchmark text detection and inpainting on synthetic fixtures.
+
+The text-removal scripts only ever ran against one hardcoded cover, so
+there was no way to compare them. Here fixtures are generated from a seed:
+textured, gradient and noise backgrounds with white text drawn at known
+positions, at several resolutions. The clean background and the exact text
+mask are kept as ground truth.
+
+Detectors, ported from the scripts:
+    refined   remove_text_refined.py (remove_text_pipeline.detect_text_mask)
+    shape     remove_text_shape_based.py (remove_text_pipeline.detect_text_shapes)
+    combined  remove_text_from_combined.py (remove_text_pyramid.combined_text_mask)
+are scored by wall time and IoU/precision/recall against the text mask.
+Inpaint methods (telea, ns, roi, tiled, pyramid) run on the true mask and
+are scored by wall time and PSNR/SSIM inside it against the clean
+background. Every case runs in a fresh process that loads its fixture
+from disk, so its peak RSS is its own; it is reported above the level
+before the timed run. Results go to JSON with the git commit, and
+--baseline prints time and quality changes against an earlier run.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import cv2
+
+BACKGROUNDS = ('texture', 'gradient', 'noise')
+DEFAULT_SIZES = (512, 1024, 2048)
+DETECTORS = ('refined', 'shape', 'combined')
+INPAINTERS = ('telea', 'ns', 'roi', 'tiled', 'pyramid')
+DEFAULT_SEED = 1
+DEFAULT_RADIUS = 5
+WARMUP_SIZE = 128
+WORDS = ("SPECIAL", "ONE", "FEAT.", "REMIX", "LIVE", "2024", "SINGLE", "DELUXE")
+
+
+def make_background(kind, size, rng):
+    """RGB uint8 background of one of BACKGROUNDS"""
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    if kind == 'gradient':
+        corners = rng.uniform(20, 200, (4, 3)).astype(np.float32)
+        top = corners[0] * (1 - x[..., None]) + corners[1] * x[..., None]
+        bottom = corners[2] * (1 - x[..., None]) + corners[3] * x[..., None]
+        image = top * (1 - y[..., None]) + bottom * y[..., None]
+    elif kind == 'noise':
+        image = rng.normal(110, 40, (size, size, 3)).astype(np.float32)
+        image = cv2.GaussianBlur(image, (0, 0), 0.8)
+    elif kind == 'texture':
+        image = np.zeros((size, size, 3), dtype=np.float32)
+        for _ in range(6):
+            fx, fy = rng.uniform(2, 24, 2)
+            phase = rng.uniform(0, 2 * np.pi)
+            wave = np.sin(2 * np.pi * (fx * x + fy * y) + phase)
+            image += wave[..., None] * rng.uniform(8, 25, 3).astype(np.float32)
+        coarse = rng.normal(0, 30, (16, 16, 3)).astype(np.float32)
+        image += cv2.resize(coarse, (size, size), interpolation=cv2.INTER_CUBIC)
+        image += 100
+    else:
+        raise ValueError(f"Unknown background {kind!r} (known: {', '.join(BACKGROUNDS)})")
+    return np.clip(image, 0, 230).astype(np.uint8)
+
+
+def render_text(size, rng):
+    """(mask, boxes): white-text mask with one line per band of the image"""
+    mask = np.zeros((size, size), dtype=np.uint8)
+    boxes = []
+    scale = size / 512
+    rows = 5
+    for row in range(rows):
+        text = " ".join(rng.choice(WORDS, 2))
+        font_scale = scale * rng.uniform(0.8, 1.6)
+        thickness = max(1, int(round(2 * scale)))
+        (w, h), base = cv2.getTextSize(text, cv2.FONT_HERSHEY_DUPLEX, font_scale, thickness)
+        band = size // rows
+        x = int(rng.integers(0, max(1, size - w)))
+        y = int(row * band + (band + h) // 2)
+        # No antialiasing, so the mask is exactly the pixels that change
+        cv2.putText(mask, text, (x, y), cv2.FONT_HERSHEY_DUPLEX, font_scale, 255, thickness,
+                    cv2.LINE_8)
+        boxes.append({'text': text, 'x': x, 'y': y - h, 'width': w, 'height': h + base})
+    return mask, boxes
+
+
+def make_fixture(kind, size, seed=DEFAULT_SEED):
+    """(image, clean background, text mask, text boxes), reproducible from the seed"""
+    rng = np.random.default_rng([seed, size, BACKGROUNDS.index(kind)])
+    clean = make_background(kind, size, rng)
+    mask, boxes = render_text(size, rng)
+    image = clean.copy()
+    image[mask > 0] = rng.integers(245, 256, 3, dtype=np.uint8)
+    return image, clean, mask, boxes
+
+
+def load_fixture(case):
+    """A case's fixture, from the .npz the parent saved when there is one"""
+    if case.get('fixture'):
+        with np.load(case['fixture']) as data:
+            return data['image'], data['clean'], data['mask'], int(data['boxes'])
+    image, clean, mask, boxes = make_fixture(case['background'], case['size'], case['seed'])
+    return image, clean, mask, len(boxes)
+
+
+def save_fixture(case, directory):
+    """Generate a case's fixture once into directory; returns the .npz path"""
+    path = os.path.join(directory, f"{case['background']}-{case['size']}-{case['seed']}.npz")
+    if not os.path.exists(path):
+        image, clean, mask, boxes = make_fixture(case['background'], case['size'], case['seed'])
+        np.savez(path, image=image, clean=clean, mask=mask, boxes=len(boxes))
+    return path
+
+
+def mask_scores(found, truth):
+    """IoU, precision and recall of a detected mask"""
+    a, b = found > 0, truth > 0
+    inter = np.count_nonzero(a & b)
+    union = np.count_nonzero(a | b)
+    return {
+        'iou': inter / union if union else 1.0,
+        'precision': inter / max(1, np.count_nonzero(a)),
+        'recall': inter / max(1, np.count_nonzero(b)),
+        'coverage': np.count_nonzero(a) / a.size,
+    }
+
+
+def ssim_map(a, b):
+    """Per-pixel SSIM of two grayscale images (11x11 Gaussian window, sigma 1.5)"""
+    a, b = a.astype(np.float64), b.astype(np.float64)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    blur = lambda x: cv2.GaussianBlur(x, (11, 11), 1.5)
+    mu_a, mu_b = blur(a), blur(b)
+    var_a = blur(a * a) - mu_a ** 2
+    var_b = blur(b * b) - mu_b ** 2
+    cov = blur(a * b) - mu_a * mu_b
+    return ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+
+
+def inpaint_scores(result, clean, mask):
+    """PSNR and SSIM inside the mask against the clean background"""
+    sel = mask > 0
+    diff = result[sel].astype(np.float64) - clean[sel]
+    mse = float(np.mean(diff ** 2))
+    gray = lambda x: cv2.cvtColor(x, cv2.COLOR_RGB2GRAY)
+    return {
+        'psnr': float('inf') if mse == 0 else float(10 * np.log10(255 ** 2 / mse)),
+        'ssim': float(ssim_map(gray(result), gray(clean))[sel].mean()),
+    }
+
+
+def run_detector(name, image):
+    if name == 'refined':
+        from remove_text_pipeline import detect_text_mask
+        return detect_text_mask(image)[0]
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    if name == 'shape':
+        from remove_text_pipeline import detect_text_shapes
+        return detect_text_shapes(gray)
+    if name == 'combined':
+        from remove_text_pyramid import combined_text_mask
+        return combined_text_mask(gray)
+    raise ValueError(f"Unknown detector {name!r}")
+
+
+def run_inpainter(name, image, mask, radius):
+    if name in ('telea', 'ns'):
+        flags = cv2.INPAINT_TELEA if name == 'telea' else cv2.INPAINT_NS
+        return cv2.inpaint(image, mask, radius, flags)
+    if name == 'roi':
+        from remove_text_roi import inpaint_roi
+        return inpaint_roi(image, mask, radius)[0]
+    if name == 'tiled':
+        from remove_text_tiled import inpaint_tiled
+        return inpaint_tiled(image, mask, radius, tile_size=max(256, image.shape[0] // 2))[0]
+    if name == 'pyramid':
+        from remove_text_pyramid import inpaint_pyramid
+        return inpaint_pyramid(image, mask, radius)[0]
+    raise ValueError(f"Unknown inpaint method {name!r}")
+
+
+def _maxrss_mb(who):
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def _proc_status_mb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 2 ** 10
+    raise OSError(f"{field} not in /proc/self/status")
+
+
+def reset_peak_rss():
+    """Current RSS in MB, after resetting the peak to it where Linux allows it
+
+    Without a reset the high-water mark still holds whatever loading the
+    fixture needed, which would hide small cases.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return _proc_status_mb('VmRSS')
+    except OSError:
+        return _maxrss_mb(resource.RUSAGE_SELF)
+
+
+def peak_rss():
+    """Peak RSS in MB since the last reset_peak_rss() (or process start)"""
+    try:
+        return _proc_status_mb('VmHWM')
+    except OSError:
+        return _maxrss_mb(resource.RUSAGE_SELF)
+
+
+def _run_stage(case, image, truth):
+    """(seconds, detected mask or inpainted image) of one timed run"""
+    start = time.perf_counter()
+    if case['stage'] == 'detect':
+        output = run_detector(case['name'], image)
+    else:
+        output = run_inpainter(case['name'], image, truth, case['radius'])
+    return time.perf_counter() - start, output
+
+
+def run_case(case):
+    """Run one (stage, name, background, size) case; returns its result entry
+
+    A run on a small fixture first pays one-off library initialisation, so
+    the timed runs (best of `repeat`) measure steady-state work. Peak RSS
+    covers the runs only, not loading the fixture or scoring.
+    """
+    warmup = make_fixture(case['background'], WARMUP_SIZE, case['seed'])
+    _run_stage(case, warmup[0], warmup[2])
+    image, clean, truth, boxes = load_fixture(case)
+    baseline = reset_peak_rss()
+    seconds, output = min((_run_stage(case, image, truth) for _ in range(case.get('repeat', 1))),
+                          key=lambda run: run[0])
+    peak = peak_rss()
+    if case['stage'] == 'detect':
+        scores = mask_scores(output, truth)
+    else:
+        scores = inpaint_scores(output, clean, truth)
+    return dict(case, seconds=seconds, text_boxes=boxes,
+                text_fraction=np.count_nonzero(truth) / truth.size,
+                rss_before_mb=baseline,
+                peak_rss_mb=peak,
+                case_rss_mb=peak - baseline,
+                children_peak_rss_mb=_maxrss_mb(resource.RUSAGE_CHILDREN),
+                **scores)
+
+
+def run_isolated(case, fixture_dir):
+    """run_case in a fresh spawned process, so peak RSS covers this case only"""
+    case = dict(case, fixture=save_fixture(case, fixture_dir))
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        result = pool.submit(run_case, case).result()
+    result.pop('fixture')
+    return result
+
+
+def plan_cases(stages, detectors, inpainters, backgrounds, sizes, seed, radius, repeat=1):
+    cases = []
+    for size in sizes:
+        for background in backgrounds:
+            base = {'background': background, 'size': size, 'seed': seed, 'radius': radius,
+                    'repeat': repeat}
+            if 'detect' in stages:
+                cases.extend(dict(base, stage='detect', name=name) for name in detectors)
+            if 'inpaint' in stages:
+                cases.extend(dict(base, stage='inpaint', name=name) for name in inpainters)
+    return cases
+
+
+def case_key(case):
+    return f"{case['stage']}/{case['name']}/{case['background']}/{case['size']}"
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def format_result(r):
+    if r['stage'] == 'detect':
+        quality = f"IoU {r['iou']:.3f}, recall {r['recall']:.3f}"
+    else:
+        quality = f"PSNR {r['psnr']:5.1f} dB, SSIM {r['ssim']:.3f}"
+    return (f"{r['stage']:<7} {r['name']:<8} {r['background']:<8} {r['size']:>5}px: "
+            f"{r['seconds'] * 1000:8.1f} ms, +{r['case_rss_mb']:5.0f} MB peak RSS, {quality}")
+
+
+def compare_line(r, old):
+    """Time and quality change of a result against the same case in a baseline"""
+    ratio = r['seconds'] / max(old['seconds'], 1e-9)
+    metric = 'iou' if r['stage'] == 'detect' else 'psnr'
+    delta = r[metric] - old[metric]
+    flag = "⚠️ " if ratio > 1.2 or delta < (-0.01 if metric == 'iou' else -0.5) else "  "
+    return f"{flag}{case_key(r)}: time x{ratio:.2f}, {metric} {delta:+.3f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark text detection and inpainting on synthetic fixtures")
+    parser.add_argument("--output", "-o", default="benchmark-text-removal.json")
+    parser.add_argument("--size", type=int, action="append", dest="sizes",
+                        help=f"fixture size in px (repeatable, default: {', '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--background", action="append", dest="backgrounds", choices=BACKGROUNDS)
+    parser.add_argument("--detector", action="append", dest="detectors", choices=DETECTORS)
+    parser.add_argument("--inpaint", action="append", dest="inpainters", choices=INPAINTERS)
+    parser.add_argument("--stage", action="append", dest="stages", choices=('detect', 'inpaint'))
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--radius", type=int, default=DEFAULT_RADIUS)
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per case (best is kept)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="run cases in this process (faster; peak RSS is then cumulative)")
+    parser.add_argument("--save-fixtures", help="write fixture images and masks to this directory")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or DEFAULT_SIZES
+    backgrounds = args.backgrounds or BACKGROUNDS
+    cases = plan_cases(args.stages or ('detect', 'inpaint'), args.detectors or DETECTORS,
+                       args.inpainters or INPAINTERS, backgrounds, sizes, args.seed, args.radius,
+                       max(1, args.repeat))
+
+    print("=" * 70)
+    print("Text Removal Benchmark")
+    print("=" * 70)
+
+    baseline = None
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"❌ ERROR: File not found: {args.baseline}")
+            return False
+        with open(args.baseline) as f:
+            baseline = {case_key(r): r for r in json.load(f)['results']}
+
+    if args.save_fixtures:
+        os.makedirs(args.save_fixtures, exist_ok=True)
+        for size in sizes:
+            for background in backgrounds:
+                image, clean, mask, _ = make_fixture(background, size, args.seed)
+                stem = os.path.join(args.save_fixtures, f"{background}-{size}")
+                cv2.imwrite(f"{stem}.png", cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+                cv2.imwrite(f"{stem}-clean.png", cv2.cvtColor(clean, cv2.COLOR_RGB2BGR))
+                cv2.imwrite(f"{stem}-mask.png", mask)
+        print(f"\n✓ Fixtures: {args.save_fixtures}")
+
+    print(f"\n{len(cases)} cases, {'in process' if args.in_process else 'one process per case'}\n")
+    start = time.perf_counter()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="text-benchmark-") as fixture_dir:
+        for case in cases:
+            result = run_case(case) if args.in_process else run_isolated(case, fixture_dir)
+            results.append(result)
+            print(f"  ✓ {format_result(result)}")
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count(),
+            'isolated': not args.in_process,
+            'results': results,
+        }, f, indent=2)
+    print(f"\n✓ Results: {args.output}")
+
+    if baseline:
+        print("\nAgainst baseline:")
+        for r in results:
+            if case_key(r) in baseline:
+                print(f"  {compare_line(r, baseline[case_key(r)])}")
+
+    print("\n" + "=" * 70)
+    print(f"✅ {len(results)} cases in {time.perf_counter() - start:.1f}s")
+    print("=" * 70)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Batch layer extraction across every artboard of a source file.
+
+(page, layer, zoom) jobs are spread over a process pool. Each worker parses
+the document once in its initializer and keeps it open for all of its jobs;
+results stream back as they finish, with a bounded number of jobs in flight
+so memory stays flat regardless of how many artboards the file holds.
+A job that fails is reported with its page and layer and the rest of the
+batch carries on; the exit status is non-zero if any job failed.
+"""
+
+import sys
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from extract_layers_engine import (
+    DEFAULT_AI_FILE,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_LAYERS,
+    DEFAULT_ZOOM,
+    layer_filename,
+    open_renderer,
+    parse_size,
+)
+from extract_layers_cache import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CACHE_SIZE,
+    RenderCache,
+    cached_render,
+    page_digest,
+)
+
+# Per-process state, set up by _init_worker
+_renderer = None
+_cache = None
+_force = False
+_page_hashes = {}
+
+
+def _init_worker(source, cache_dir=None, cache_bytes=None, force=False):
+    global _renderer, _cache, _force
+    _renderer = open_renderer(source)
+    _cache = None if cache_dir is None else RenderCache(cache_dir, cache_bytes)
+    _force = force
+
+
+def _render_job(job):
+    """Render one job in a worker and write it to disk; only metadata goes back"""
+    page_no, layer, zoom, path = job
+    start = time.perf_counter()
+    layers = None if layer is None else [layer]
+    hit = False
+    if _cache is None:
+        _renderer.render(page_no, layers, zoom=zoom).save(path)
+    else:
+        if page_no not in _page_hashes:
+            _page_hashes[page_no] = page_digest(_renderer.doc, page_no)
+        hit = cached_render(_cache, _renderer, page_no, layers, path, zoom,
+                            force=_force, page_hash=_page_hashes[page_no])
+    return {
+        'page': page_no + 1,
+        'layer': layer,
+        'zoom': zoom,
+        'path': path,
+        'cached': hit,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def plan_jobs(page_count, layers, zooms, output_dir, pages=None, prefix="artboard"):
+    """Build (page, layer, zoom, output path) jobs for every requested combination"""
+    pages = range(1, page_count + 1) if pages is None else pages
+    jobs = []
+    for page in pages:
+        for zoom in zooms:
+            zoom_suffix = "" if len(zooms) == 1 else f"@{zoom:g}x"
+            for layer in layers:
+                name = layer_filename(f"{prefix}-{page}", layer)
+                if zoom_suffix:
+                    stem, ext = os.path.splitext(name)
+                    name = f"{stem}{zoom_suffix}{ext}"
+                jobs.append((page - 1, layer, zoom, os.path.join(output_dir, name)))
+    return jobs
+
+
+def _failed_job(source, job, error):
+    """Result entry for a job whose render raised"""
+    page_no, layer, zoom, path = job
+    return {
+        'source': source,
+        'page': page_no + 1,
+        'layer': layer,
+        'zoom': zoom,
+        'path': path,
+        'cached': False,
+        'error': f"{type(error).__name__}: {error}",
+    }
+
+
+def run_batch(source, jobs, workers=None, max_in_flight=None, cache=None, force=False):
+    """Yield job results as they complete, keeping at most max_in_flight jobs queued
+
+    A job that raises yields a result with an 'error' message instead.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    pending = iter(jobs)
+    in_flight = {}
+    cache_args = (None, None) if cache is None else (cache.directory, cache.max_bytes)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(source, *cache_args, force)) as pool:
+        def submit():
+            for job in pending:
+                in_flight[pool.submit(_render_job, job)] = job
+                if len(in_flight) >= max_in_flight:
+                    break
+
+        submit()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = in_flight.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    yield _failed_job(source, job, e)
+            submit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract layers from every artboard in parallel")
+    parser.add_argument("source", nargs="?", default=DEFAULT_AI_FILE)
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--page", type=int, action="append", dest="pages",
+                        help="1-based page to include (repeatable, default: all)")
+    parser.add_argument("--layer", "-l", action="append", dest="layers",
+                        help="layer name to export (repeatable)")
+    parser.add_argument("--zoom", type=float, action="append", dest="zooms",
+                        help=f"zoom level (repeatable, default: {DEFAULT_ZOOM})")
+    parser.add_argument("--reference", action="store_true",
+                        help="also render the all-layers reference per page")
+    parser.add_argument("--prefix", default="artboard")
+    parser.add_argument("--workers", "-j", type=int, default=None)
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="re-render even when cached")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the render cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--cache-size", default=DEFAULT_CACHE_SIZE, help="cache budget, e.g. 2G")
+    args = parser.parse_args(argv)
+
+    layers = list(args.layers or DEFAULT_LAYERS)
+    if args.reference:
+        layers.append(None)
+    zooms = args.zooms or [DEFAULT_ZOOM]
+
+    print("=" * 70)
+    print("Batch Layer Extraction - All Artboards")
+    print("=" * 70)
+    print(f"\nSource: {args.source}")
+    print(f"Output: {args.output}\n")
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+
+    os.makedirs(args.output, exist_ok=True)
+
+    with open_renderer(args.source) as renderer:
+        page_count = renderer.page_count
+        missing = [l for l in layers if l is not None and l.upper() not in renderer.layers]
+    if missing:
+        print(f"❌ ERROR: Unknown layer(s): {', '.join(missing)}")
+        return False
+    bad_pages = [p for p in args.pages or [] if not 1 <= p <= page_count]
+    if bad_pages:
+        print(f"❌ ERROR: Page(s) out of range (1-{page_count}): {bad_pages}")
+        return False
+
+    jobs = plan_jobs(page_count, layers, zooms, args.output, args.pages, args.prefix)
+    print(f"✓ {len(jobs)} jobs over {page_count} pages\n")
+
+    cache = None if args.no_cache else RenderCache(args.cache_dir, parse_size(args.cache_size))
+
+    start = time.perf_counter()
+    done = 0
+    cached = 0
+    failed = []
+    for result in run_batch(args.source, jobs, args.workers, args.max_in_flight,
+                            cache=cache, force=args.force):
+        done += 1
+        label = result['layer'].upper() if result['layer'] else "REFERENCE"
+        if result.get('error'):
+            failed.append(result)
+            print(f"  ❌ [{done}/{len(jobs)}] page {result['page']} {label} @{result['zoom']:g}x: "
+                  f"{result['error']}")
+            continue
+        cached += result['cached']
+        status = "cached" if result['cached'] else f"{result['seconds']:.2f}s"
+        print(f"  ✓ [{done}/{len(jobs)}] page {result['page']} {label} @{result['zoom']:g}x: "
+              f"{result['path']} ({status})")
+
+    if cache is not None:
+        cache.evict()
+
+    elapsed = time.perf_counter() - start
+    print("\n" + "=" * 70)
+    if failed:
+        print(f"⚠️  {done - len(failed)} outputs ({cached} from cache), {len(failed)} failed "
+              f"in {elapsed:.2f}s")
+        for result in failed:
+            label = result['layer'].upper() if result['layer'] else "REFERENCE"
+            print(f"   {result['source']} page {result['page']} {label}: {result['error']}")
+    else:
+        print(f"✅ {done} outputs ({cached} from cache) in {elapsed:.2f}s")
+    print("=" * 70)
+    return not failed
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
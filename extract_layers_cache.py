@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Content-addressed output cache for layer renders.
+
+Renders are keyed on (page content hash, layer set, zoom, alpha, output
+format). The page hash covers the page dictionary, the attributes it
+inherits from the page tree (/Resources, /MediaBox, /CropBox, /Rotate),
+its content streams and every object it references (fonts, images,
+OCGs), with object numbers
+normalised so a re-save that only renumbers objects still hits. A rerun on
+an unchanged artboard is a lookup plus a file copy (a reflink on
+filesystems that share extents) instead of a render. Outputs are never
+hard links, so later tools that rewrite an output in place cannot change
+the cached blob. Entries are evicted least-recently-used once the cache
+exceeds its byte budget.
+"""
+
+import sys
+import os
+import re
+import json
+import shutil
+import hashlib
+import argparse
+
+from extract_layers_engine import parse_size
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RENDER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "spotify-music-player", "render-cache"),
+)
+DEFAULT_CACHE_SIZE = "2G"
+# Linux ioctl that makes a file share another's extents (btrfs, XFS)
+FICLONE = 0x40049409
+
+_REF = re.compile(r'(\d+)\s+0\s+R')
+# Back-references that would pull in the whole page tree
+_BACK_REFS = re.compile(r'/(Parent|P|Prev|Next|First|Last)\s+\d+\s+0\s+R')
+# Page attributes a page takes from its /Parent chain when it lacks them
+INHERITABLE = ("Resources", "MediaBox", "CropBox", "Rotate")
+
+
+def inherited_attributes(doc, page_xref):
+    """PDF source of the inheritable attributes a page gets from its ancestors"""
+    found = []
+    for key in INHERITABLE:
+        if doc.xref_get_key(page_xref, key)[0] != "null":
+            continue
+        xref, seen = page_xref, set()
+        while xref not in seen:
+            seen.add(xref)
+            kind, parent = doc.xref_get_key(xref, "Parent")
+            if kind != "xref":
+                break
+            xref = int(parent.split()[0])
+            kind, value = doc.xref_get_key(xref, key)
+            if kind != "null":
+                found.append(f"/{key} {value}")
+                break
+    return " ".join(found)
+
+
+def page_digest(doc, page_no):
+    """SHA-256 of a page and everything it references, independent of object numbers"""
+    page = doc[page_no]
+    h = hashlib.sha256()
+    order = {}
+    queue = [page.xref]
+    order[page.xref] = 0
+
+    def renumber(match):
+        xref = int(match.group(1))
+        if xref not in order:
+            order[xref] = len(order)
+            queue.append(xref)
+        return f"@{order[xref]}"
+
+    # Cutting /Parent below would lose what the page inherits through it
+    h.update(_REF.sub(renumber, inherited_attributes(doc, page.xref)).encode('latin-1', 'replace'))
+    h.update(b'\x00')
+    while queue:
+        xref = queue.pop(0)
+        source = _BACK_REFS.sub('', doc.xref_object(xref, compressed=True))
+        h.update(_REF.sub(renumber, source).encode('latin-1', 'replace'))
+        if doc.xref_is_stream(xref):
+            h.update(doc.xref_stream_raw(xref) or b'')
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def render_key(page_hash, layers, zoom, alpha=True, fmt='png'):
+    """Cache key for one render"""
+    layer_set = None if layers is None else sorted(str(l).upper() for l in layers)
+    spec = {
+        'version': CACHE_VERSION,
+        'page': page_hash,
+        'layers': layer_set,
+        'zoom': round(float(zoom), 6),
+        'alpha': bool(alpha),
+        'format': fmt,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def _reflink(src, dst):
+    """Clone src to dst without copying data; False where the filesystem can't"""
+    try:
+        import fcntl
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def copy_output(blob, dest):
+    """Place an independent copy of a cached blob at dest (a reflink where possible)"""
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    try:
+        if not _reflink(blob, tmp):
+            shutil.copyfile(blob, tmp)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+class RenderCache:
+    """Directory of render blobs with LRU eviction by total bytes"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=parse_size(DEFAULT_CACHE_SIZE)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, ext='.png'):
+        return os.path.join(self.directory, key[:2], f"{key}{ext}")
+
+    def lookup(self, key, ext='.png'):
+        """Blob path for a key, touching it for LRU; None on a miss"""
+        blob = self.path(key, ext)
+        try:
+            os.utime(blob)
+        except FileNotFoundError:
+            return None
+        return blob
+
+    def store(self, key, writer, ext='.png'):
+        """Create the blob for `key` by calling writer(tmp_path); returns the blob path"""
+        blob = self.path(key, ext)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        tmp = f"{blob}.{os.getpid()}.tmp"
+        try:
+            writer(tmp)
+            os.replace(tmp, blob)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        return blob
+
+    def entries(self):
+        """(mtime, size, path) for every blob"""
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                found.append((st.st_mtime, st.st_size, path))
+        return found
+
+    def evict(self):
+        """Drop least recently used blobs until the cache fits max_bytes"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed, total
+
+
+def cached_render(cache, renderer, page_no, layers, dest, zoom, alpha=True,
+                  force=False, page_hash=None):
+    """Write a render to dest through the cache; returns True on a cache hit"""
+    page_hash = page_hash or page_digest(renderer.doc, page_no)
+    key = render_key(page_hash, layers, zoom, alpha)
+
+    blob = None if force else cache.lookup(key)
+    hit = blob is not None
+    if not hit:
+        def write(tmp):
+            pix = renderer.render(page_no, layers, zoom=zoom, alpha=alpha)
+            pix.save(tmp, output="png")
+        blob = cache.store(key, write)
+    copy_output(blob, dest)
+    return hit
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or trim the layer render cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--cache-size", default=DEFAULT_CACHE_SIZE)
+    parser.add_argument("--clear", action="store_true", help="remove every cached render")
+    args = parser.parse_args(argv)
+
+    cache = RenderCache(args.cache_dir, 0 if args.clear else parse_size(args.cache_size))
+    removed, total = cache.evict()
+
+    print("=" * 70)
+    print("Layer Render Cache")
+    print("=" * 70)
+    print(f"\nDirectory: {cache.directory}")
+    print(f"Entries:   {len(cache.entries())} ({total / (1 << 20):.1f} MB)")
+    print(f"Evicted:   {removed}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
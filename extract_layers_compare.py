@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Chunked layer-difference report.
+
+Compares two renders row chunk by row chunk on uint8 data, without the
+int64 copies that np.abs(a.astype(int) - b.astype(int)) makes. For each
+pair it reports the changed-pixel count, bounding boxes of the differing
+regions, the per-channel max delta and an average hash of each image.
+
+Working memory is one chunk per image plus a coarse occupancy grid. .lraw
+layer files and bare .rgba inputs (the tiled renderer's --format layer and
+raw outputs) are memory-mapped, so they stay constant at any resolution; PNGs are decoded once by Pillow
+and then read out a chunk at a time.
+"""
+
+import sys
+import os
+import json
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import cv2
+from PIL import Image
+
+from layer_raw import is_layer_file, open_layer
+
+DEFAULT_CHUNK_ROWS = 256
+DEFAULT_CELL = 16  # grid cell size (px) used to group differences into regions
+HASH_SIZE = 8
+
+
+class ImageSource:
+    """Row-chunk reader over a PNG, a .lraw layer file or a bare raw RGBA file"""
+
+    def __init__(self, path, width=None, height=None, channels=4):
+        self.path = path
+        self._image = None
+        self._raw = None
+        if is_layer_file(path):
+            self._raw = open_layer(path)
+            self.height, self.width, self.channels = self._raw.shape
+        elif path.endswith('.rgba'):
+            if not width:
+                raise ValueError(f"{path}: raw input needs --raw-width")
+            size = os.path.getsize(path)
+            height = height or size // (width * channels)
+            self._raw = np.memmap(path, dtype=np.uint8, mode='r', shape=(height, width, channels))
+            self.width, self.height, self.channels = width, height, channels
+        else:
+            self._image = Image.open(path)
+            if self._image.mode not in ('L', 'RGB', 'RGBA'):
+                self._image = self._image.convert('RGBA')
+            self.width, self.height = self._image.size
+            self.channels = len(self._image.getbands())
+
+    def rows(self, y0, y1):
+        """uint8 array of rows [y0, y1) with shape (rows, width, channels)"""
+        if self._raw is not None:
+            return self._raw[y0:y1]
+        chunk = np.asarray(self._image.crop((0, y0, self.width, y1)))
+        return chunk.reshape(y1 - y0, self.width, self.channels)
+
+
+def _rgba(chunk):
+    """View or expand a chunk to 4 channels (only L/RGB inputs are copied)"""
+    if chunk.shape[2] == 4:
+        return chunk
+    if chunk.shape[2] == 1:
+        chunk = np.repeat(chunk, 3, axis=2)
+    alpha = np.full(chunk.shape[:2] + (1,), 255, dtype=np.uint8)
+    return np.concatenate([chunk, alpha], axis=2)
+
+
+class AverageHash:
+    """Accumulates an average hash over row chunks"""
+
+    def __init__(self, width, height, size=HASH_SIZE):
+        self.size = size
+        self.height = height
+        self.sums = np.zeros((size, size), dtype=np.float64)
+        col_block = (np.arange(width) * size) // width
+        row_block = (np.arange(height) * size) // height
+        self._col_starts = np.searchsorted(col_block, np.arange(size))
+        self._area = np.outer(np.bincount(row_block, minlength=size),
+                              np.bincount(col_block, minlength=size))
+
+    def update(self, chunk, y0):
+        # Luminance of the image composited over black (float32, one chunk only)
+        rgba = chunk.astype(np.float32)
+        luma = rgba[..., 0] * 0.299 + rgba[..., 1] * 0.587 + rgba[..., 2] * 0.114
+        luma *= rgba[..., 3] / 255.0
+        row_block = (np.arange(y0, y0 + len(chunk)) * self.size) // self.height
+        np.add.at(self.sums, row_block, np.add.reduceat(luma, self._col_starts, axis=1))
+
+    def digest(self):
+        means = self.sums / np.maximum(self._area, 1)
+        bits = (means > means.mean()).flatten()
+        return int(''.join('1' if b else '0' for b in bits), 2)
+
+
+def _grid_update(changed, y0, cell, occupied, extents):
+    """Fold a chunk's changed-pixel mask into the region grid"""
+    rows, width = changed.shape
+    pad_w = (-width) % cell
+    pad_h = (-rows) % cell
+    if pad_w or pad_h:
+        changed = np.pad(changed, ((0, pad_h), (0, pad_w)))
+    gr, gc = changed.shape[0] // cell, changed.shape[1] // cell
+    blocks = changed.reshape(gr, cell, gc, cell)
+    row_any = blocks.any(axis=3)  # (gr, cell, gc)
+    col_any = blocks.any(axis=1)  # (gr, gc, cell)
+    hit = row_any.any(axis=1)
+    if not hit.any():
+        return
+
+    g0 = y0 // cell
+    ymin = g0 * cell + np.arange(gr)[:, None] * cell + row_any.argmax(axis=1)
+    ymax = g0 * cell + np.arange(gr)[:, None] * cell + cell - 1 - row_any[:, ::-1].argmax(axis=1)
+    xmin = np.arange(gc)[None, :] * cell + col_any.argmax(axis=2)
+    xmax = np.arange(gc)[None, :] * cell + cell - 1 - col_any[..., ::-1].argmax(axis=2)
+
+    region = slice(g0, g0 + gr)
+    occupied[region] |= hit
+    ext = extents[:, region]
+    ext[0] = np.where(hit, np.minimum(ext[0], xmin), ext[0])
+    ext[1] = np.where(hit, np.minimum(ext[1], ymin), ext[1])
+    ext[2] = np.where(hit, np.maximum(ext[2], xmax), ext[2])
+    ext[3] = np.where(hit, np.maximum(ext[3], ymax), ext[3])
+
+
+def _regions(occupied, extents):
+    """Bounding boxes (x0, y0, x1, y1), exclusive ends, of 8-connected groups of changed cells"""
+    count, labels = cv2.connectedComponents(occupied.astype(np.uint8), connectivity=8)
+    if count <= 1:
+        return []
+    flat = labels.ravel()
+    cells = flat > 0
+    idx = flat[cells] - 1
+    big = np.iinfo(np.int32).max
+    boxes = np.stack([np.full(count - 1, big), np.full(count - 1, big),
+                      np.full(count - 1, -1), np.full(count - 1, -1)]).astype(np.int64)
+    np.minimum.at(boxes[0], idx, extents[0].ravel()[cells])
+    np.minimum.at(boxes[1], idx, extents[1].ravel()[cells])
+    np.maximum.at(boxes[2], idx, extents[2].ravel()[cells])
+    np.maximum.at(boxes[3], idx, extents[3].ravel()[cells])
+    return [(int(x0), int(y0), int(x1) + 1, int(y1) + 1) for x0, y0, x1, y1 in boxes.T]
+
+
+def compare_images(a, b, chunk_rows=DEFAULT_CHUNK_ROWS, cell=DEFAULT_CELL):
+    """Difference report for two ImageSources (or paths)"""
+    a = a if isinstance(a, ImageSource) else ImageSource(a)
+    b = b if isinstance(b, ImageSource) else ImageSource(b)
+    if (a.width, a.height) != (b.width, b.height):
+        raise ValueError(f"Size mismatch: {a.width}x{a.height} vs {b.width}x{b.height}")
+
+    width, height = a.width, a.height
+    chunk_rows = max(cell, chunk_rows - chunk_rows % cell)
+    grid_shape = (-(-height // cell), -(-width // cell))
+    occupied = np.zeros(grid_shape, dtype=bool)
+    extents = np.empty((4,) + grid_shape, dtype=np.int32)
+    extents[:2] = np.iinfo(np.int32).max
+    extents[2:] = -1
+
+    changed_pixels = 0
+    max_delta = np.zeros(4, dtype=np.uint8)
+    hash_a = AverageHash(width, height)
+    hash_b = AverageHash(width, height)
+
+    for y0 in range(0, height, chunk_rows):
+        y1 = min(height, y0 + chunk_rows)
+        ca, cb = _rgba(a.rows(y0, y1)), _rgba(b.rows(y0, y1))
+        # |a - b| in uint8 without widening
+        delta = np.maximum(ca, cb)
+        delta -= np.minimum(ca, cb)
+        np.maximum(max_delta, delta.max(axis=(0, 1)), out=max_delta)
+        changed = delta.any(axis=2)
+        n = int(np.count_nonzero(changed))
+        if n:
+            changed_pixels += n
+            _grid_update(changed, y0, cell, occupied, extents)
+        hash_a.update(ca, y0)
+        hash_b.update(cb, y0)
+
+    ha, hb = hash_a.digest(), hash_b.digest()
+    return {
+        'a': a.path,
+        'b': b.path,
+        'width': width,
+        'height': height,
+        'identical': changed_pixels == 0,
+        'changed_pixels': changed_pixels,
+        'changed_fraction': changed_pixels / (width * height),
+        'max_delta': dict(zip('RGBA', (int(v) for v in max_delta))),
+        'regions': _regions(occupied, extents),
+        'hash_a': f"{ha:016x}",
+        'hash_b': f"{hb:016x}",
+        'hash_distance': bin(ha ^ hb).count('1'),
+    }
+
+
+def layer_pairs(directory, prefix):
+    """Every pair of same-sized <prefix>-*.png layer renders in an output directory"""
+    by_size = {}
+    for name in sorted(os.listdir(directory)):
+        if name.startswith(f"{prefix}-") and name.endswith('.png'):
+            path = os.path.join(directory, name)
+            with Image.open(path) as im:  # reads the header only
+                by_size.setdefault(im.size, []).append(path)
+    return [pair for paths in by_size.values() for pair in itertools.combinations(paths, 2)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report differences between layer renders")
+    parser.add_argument("images", nargs="*", help="image pairs: A1 B1 [A2 B2 ...]")
+    parser.add_argument("--dir", help="compare every pair of <prefix>-*.png files in a directory")
+    parser.add_argument("--prefix", default="special-one")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--cell", type=int, default=DEFAULT_CELL,
+                        help="grid size (px) for grouping differences into regions")
+    parser.add_argument("--raw-width", type=int, help="width of .rgba inputs")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    if len(args.images) % 2:
+        print("❌ ERROR: Images must be given in pairs")
+        return False
+    pairs = list(zip(args.images[::2], args.images[1::2]))
+    if args.dir:
+        pairs += layer_pairs(args.dir, args.prefix)
+    if not pairs:
+        print("❌ ERROR: Nothing to compare (give image pairs or --dir)")
+        return False
+
+    def run(pair):
+        try:
+            sources = [ImageSource(p, args.raw_width) for p in pair]
+            return compare_images(*sources, chunk_rows=args.chunk_rows, cell=args.cell)
+        except (OSError, ValueError) as e:
+            return {'a': pair[0], 'b': pair[1], 'error': str(e)}
+
+    print("=" * 70)
+    print("Layer Difference Report")
+    print("=" * 70)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        reports = list(pool.map(run, pairs))
+
+    ok = True
+    for report in reports:
+        label = f"{os.path.basename(report['a'])} vs {os.path.basename(report['b'])}"
+        if 'error' in report:
+            ok = False
+            print(f"\n❌ {label}: {report['error']}")
+            continue
+        if report['identical']:
+            print(f"\n⚠️  {label}: IDENTICAL")
+            continue
+        deltas = ", ".join(f"{k}={v}" for k, v in report['max_delta'].items())
+        print(f"\n✓ {label}: {report['changed_pixels']:,} different pixels "
+              f"({report['changed_fraction'] * 100:.2f}%)")
+        print(f"    max delta {deltas}; hash distance {report['hash_distance']}/{HASH_SIZE ** 2}")
+        regions = report['regions']
+        for x0, y0, x1, y1 in regions[:5]:
+            print(f"    region ({x0}, {y0})-({x1}, {y1})")
+        if len(regions) > 5:
+            print(f"    ... {len(regions) - 5} more regions")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n✓ Report: {args.json}")
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -96,16 +96,11 @@ def extract_layers_correct():
     
     # Verify they're different
     try:
-        from PIL import Image
-        import numpy as np
+        from extract_layers_compare import compare_images
         
-        bg_img = Image.open(bg_path)
-        texture_img = Image.open(texture_path)
+        report = compare_images(bg_path, texture_path)
         
-        bg_array = np.array(bg_img)
-        texture_array = np.array(texture_img)
-        
-        if np.array_equal(bg_array, texture_array):
+        if report['identical']:
             print("\n" + "=" * 70)
             print("⚠️  WARNING: Images are still IDENTICAL!")
             print("=" * 70)
@@ -120,8 +115,9 @@ def extract_layers_correct():
             print("  - Try manual export if possible")
             print("  - Consider if layers are actually separate in the source file")
         else:
-            diff = np.sum(np.abs(bg_array.astype(int) - texture_array.astype(int)) > 0)
-            print(f"\n✓ Images are DIFFERENT ({diff:,} different pixels)")
+            diff = report['changed_pixels']
+            print(f"\n✓ Images are DIFFERENT ({diff:,} different pixels, "
+                  f"{len(report['regions'])} regions)")
             
     except Exception as e:
         print(f"\n⚠️  Could not verify difference: {e}")
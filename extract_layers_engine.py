@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Single-parse layer extraction engine.
+
+Opens the Illustrator/PDF source once (in memory via fitz.open(stream=...))
+and renders any number of layers from that one document by switching an
+optional-content config, instead of patching the bytes and re-parsing a
+temp file per layer.
+"""
+
+import sys
+import os
+import re
+import argparse
+from collections import OrderedDict
+
+import fitz
+
+from extract_layers_index import load_index, layer_xrefs
+
+DEFAULT_AI_FILE = "/Users/sachahurley/Desktop/NOVEL_TEA_SINGLES (1).ai"
+DEFAULT_OUTPUT_DIR = "/Users/sachahurley/spotify-music-player/public/images/special-one-layers"
+DEFAULT_PAGE = 5  # Artboard 5 (Special One), 1-based like Illustrator
+DEFAULT_ZOOM = 3.0  # 648pt artboard -> 1944x1944px
+DEFAULT_LAYERS = ("BACKGROUND", "TEXTURE")
+
+# Name of the optional-content config the engine owns inside the document
+EXTRACT_CONFIG_NAME = "layer-extract"
+
+# Memory budget for cached display lists. MuPDF doesn't report a display
+# list's size, so it is estimated from the content it was built from.
+DEFAULT_DISPLAY_LIST_MEMORY = "256M"
+DISPLAY_LIST_CONTENT_FACTOR = 4  # display list bytes per content stream byte
+
+
+def parse_size(text):
+    """Parse sizes like 256M, 1.5G, 512k or plain bytes"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kKmMgG]?)[bB]?\s*', str(text))
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    number, unit = match.groups()
+    scale = {'': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}[unit.lower()]
+    return int(float(number) * scale)
+
+
+def open_document(source):
+    """Open a PDF/.ai source from a path or raw bytes, parsing it exactly once"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    with open(source, 'rb') as f:
+        data = f.read()
+    return fitz.open(stream=data, filetype="pdf")
+
+
+def layer_name_map(doc):
+    """Map upper-cased OCG names to their xrefs"""
+    layers = {}
+    for xref, info in doc.get_ocgs().items():
+        name = (info.get('name') or '').strip().upper()
+        if name and name not in layers:
+            layers[name] = xref
+    return layers
+
+
+class LayerRenderer:
+    """Renders layer combinations of one open document"""
+
+    def __init__(self, source, layers=None, display_list_bytes=None):
+        self.doc = source if isinstance(source, fitz.Document) else open_document(source)
+        self.layers = layer_name_map(self.doc) if layers is None else dict(layers)
+        self.display_list_bytes = (parse_size(DEFAULT_DISPLAY_LIST_MEMORY)
+                                   if display_list_bytes is None else display_list_bytes)
+        self._config = None
+        self._visible = None
+        self._display_lists = OrderedDict()  # (page_no, visible xrefs) -> (DisplayList, cost)
+        self._display_list_total = 0
+        self._page_costs = {}
+        self.interpretations = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.clear_display_lists()
+        if not self.doc.is_closed:
+            self.doc.close()
+
+    @property
+    def page_count(self):
+        return len(self.doc)
+
+    def resolve(self, layers):
+        """Turn layer names (or xrefs) into a sorted tuple of OCG xrefs"""
+        xrefs = set()
+        for layer in layers:
+            if isinstance(layer, int):
+                xrefs.add(layer)
+                continue
+            xref = self.layers.get(layer.strip().upper())
+            if xref is None:
+                known = ", ".join(sorted(self.layers)) or "none"
+                raise KeyError(f"Unknown layer {layer!r} (known layers: {known})")
+            xrefs.add(xref)
+        return tuple(sorted(xrefs))
+
+    def _extract_config(self):
+        """Index of the engine's own OC config, created on first use"""
+        if self._config is None:
+            configs = self.doc.get_layers()
+            for config in configs:
+                if config.get('name') == EXTRACT_CONFIG_NAME:
+                    self._config = config['number']
+                    break
+            else:
+                # get_layers() only refreshes after a switch, so the new
+                # config's index is the count taken before adding it
+                self.doc.add_layer(EXTRACT_CONFIG_NAME)
+                self._config = len(configs)
+        return self._config
+
+    def show_only(self, layers):
+        """Make exactly the given layers visible; everything else in an OCG is hidden"""
+        xrefs = self.resolve(layers)
+        if xrefs == self._visible:
+            return xrefs
+        config = self._extract_config()
+        self.doc.set_layer(config, basestate="OFF", on=list(xrefs))
+        self.doc.switch_layer(config)
+        self._visible = xrefs
+        return xrefs
+
+    def show_all(self):
+        """Make every layer visible (the full artboard reference)"""
+        return self.show_only(list(self.layers.values()))
+
+    def render(self, page_no, layers=None, zoom=DEFAULT_ZOOM, alpha=True, clip=None):
+        """Render a page (0-based) with only `layers` visible (None = all layers)
+
+        `clip` is an optional rectangle in page coordinates.
+        """
+        if layers is None:
+            self.show_all()
+        else:
+            self.show_only(layers)
+        return self.display_list(page_no).get_pixmap(
+            matrix=fitz.Matrix(zoom, zoom), alpha=alpha, clip=clip)
+
+    def _page_cost(self, page_no):
+        """Estimated display list size for a page: its content plus the images it holds"""
+        if page_no not in self._page_costs:
+            page = self.doc[page_no]
+            cost = len(page.read_contents())
+            for xref, *_ in page.get_xobjects():
+                cost += len(self.doc.xref_stream(xref) or b'')
+            cost *= DISPLAY_LIST_CONTENT_FACTOR
+            for xref, *_ in page.get_images(full=True):
+                # Images are kept compressed and referenced, not copied
+                cost += len(self.doc.xref_stream_raw(xref) or b'')
+            self._page_costs[page_no] = cost
+        return self._page_costs[page_no]
+
+    def display_list(self, page_no):
+        """Display list of a page under the current layer visibility
+
+        Built once per (page, visible layers) and replayed for every zoom,
+        clip and alpha variant; least recently used lists are dropped once
+        the estimated total exceeds display_list_bytes.
+        """
+        key = (page_no, self._visible)
+        entry = self._display_lists.get(key)
+        if entry is not None:
+            self._display_lists.move_to_end(key)
+            return entry[0]
+
+        dl = self.doc[page_no].get_displaylist()
+        self.interpretations += 1
+        cost = self._page_cost(page_no)
+        self._display_lists[key] = (dl, cost)
+        self._display_list_total += cost
+        while self._display_list_total > self.display_list_bytes and len(self._display_lists) > 1:
+            _, (_, evicted) = self._display_lists.popitem(last=False)
+            self._display_list_total -= evicted
+        return dl
+
+    def clear_display_lists(self):
+        """Forget cached display lists (needed after editing page content)"""
+        self._display_lists.clear()
+        self._display_list_total = 0
+        self._page_costs.clear()
+
+    def render_layers(self, page_no, layers, zoom=DEFAULT_ZOOM, alpha=True):
+        """Yield (layer, pixmap) for each layer rendered on its own"""
+        for layer in layers:
+            yield layer, self.render(page_no, [layer], zoom=zoom, alpha=alpha)
+
+
+def open_renderer(path):
+    """LayerRenderer whose layer names come from the cached on-disk index"""
+    doc = open_document(path)
+    try:
+        index = load_index(path, doc=doc)
+    except OSError:
+        # Read-only cache location: fall back to scanning the OCGs
+        return LayerRenderer(doc)
+    return LayerRenderer(doc, layers=layer_xrefs(index))
+
+
+def layer_filename(prefix, layer):
+    """Output name used by the app, e.g. special-one-background.png"""
+    if layer is None:
+        return f"{prefix}-all-layers-reference.png"
+    return f"{prefix}-{layer.lower()}.png"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render Illustrator layers from a single parse")
+    parser.add_argument("source", nargs="?", default=DEFAULT_AI_FILE)
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--page", type=int, default=DEFAULT_PAGE, help="1-based artboard/page number")
+    parser.add_argument("--layer", "-l", action="append", dest="layers",
+                        help="layer name to export (repeatable)")
+    parser.add_argument("--zoom", type=float, default=DEFAULT_ZOOM)
+    parser.add_argument("--prefix", default="special-one")
+    parser.add_argument("--reference", action="store_true",
+                        help="also render the all-layers reference image")
+    parser.add_argument("--force", action="store_true", help="re-render even when cached")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the render cache")
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--cache-size", default=None, help="cache budget, e.g. 2G")
+    args = parser.parse_args(argv)
+
+    # Imported here: the cache module itself builds on this one
+    from extract_layers_cache import (
+        DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, RenderCache, cached_render, page_digest,
+    )
+
+    layers = args.layers or list(DEFAULT_LAYERS)
+
+    print("=" * 70)
+    print(f"Layer Extraction - Artboard {args.page}")
+    print("=" * 70)
+    print(f"\nSource: {args.source}")
+    print(f"Output: {args.output}\n")
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+
+    os.makedirs(args.output, exist_ok=True)
+
+    with open_renderer(args.source) as renderer:
+        print(f"✓ Parsed once: {renderer.page_count} pages, "
+              f"layers: {', '.join(sorted(renderer.layers)) or 'none'}\n")
+        if not 1 <= args.page <= renderer.page_count:
+            print(f"❌ ERROR: Page {args.page} out of range (1-{renderer.page_count})")
+            return False
+
+        page_no = args.page - 1
+        cache = None
+        page_hash = None
+        if not args.no_cache:
+            cache = RenderCache(args.cache_dir or DEFAULT_CACHE_DIR,
+                                parse_size(args.cache_size or DEFAULT_CACHE_SIZE))
+            page_hash = page_digest(renderer.doc, page_no)
+
+        targets = [[layer] for layer in layers]
+        if args.reference:
+            targets.append(None)
+
+        ok = True
+        for target in targets:
+            label = target[0].upper() if target else "Reference"
+            path = os.path.join(args.output, layer_filename(args.prefix, target and target[0]))
+            try:
+                if cache is None:
+                    renderer.render(page_no, target, zoom=args.zoom).save(path)
+                    hit = False
+                else:
+                    hit = cached_render(cache, renderer, page_no, target, path, args.zoom,
+                                        force=args.force, page_hash=page_hash)
+            except KeyError as e:
+                print(f"  ❌ {label}: {e.args[0]}")
+                ok = False
+                continue
+            print(f"  ✓ {label}: {path}{' (cached)' if hit else ''}")
+
+        if cache is not None:
+            cache.evict()
+
+    print("\n" + "=" * 70)
+    print("✅ SUCCESS" if ok else "⚠️  PARTIAL SUCCESS")
+    print("=" * 70)
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Persistent layer-name -> OCG xref index for Illustrator/PDF sources.
+
+The index (layer name -> xref -> pages that use it) is built once per source
+file and cached on disk, keyed by the SHA-256 of the file content. Later
+runs resolve "BACKGROUND", "TYPE" or "TEXTURE" with a dict lookup instead of
+scanning OCGs or guessing xrefs 9/10/11. A re-saved file that renumbers its
+objects has a different hash, so its index is simply rebuilt by name.
+"""
+
+import sys
+import os
+import re
+import json
+import hashlib
+import argparse
+
+import fitz
+
+INDEX_VERSION = 2
+DEFAULT_INDEX_DIR = os.environ.get(
+    "LAYER_INDEX_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "spotify-music-player", "layer-index"),
+)
+
+_REF = re.compile(r'(\d+)\s+0\s+R')
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file, read in chunks"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def source_digest(path, index_dir=DEFAULT_INDEX_DIR):
+    """Content hash of `path`, skipping the re-hash when size and mtime are unchanged"""
+    stat_file = os.path.join(index_dir, "stat-map.json")
+    try:
+        with open(stat_file) as f:
+            stat_map = json.load(f)
+    except (OSError, ValueError):
+        stat_map = {}
+
+    key = _stat_key(path)
+    digest = stat_map.get(key)
+    if digest is None:
+        digest = file_digest(path)
+        # Forget stale size/mtime entries for the same path
+        prefix = key.rsplit("|", 2)[0] + "|"
+        stat_map = {k: v for k, v in stat_map.items() if not k.startswith(prefix)}
+        stat_map[key] = digest
+        os.makedirs(index_dir, exist_ok=True)
+        _write_json(stat_file, stat_map)
+    return digest
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _ocg_members(doc, xref, ocg_xrefs):
+    """OCG xrefs behind one reference: the OCG itself or an OCMD's /OCGs"""
+    if xref in ocg_xrefs:
+        return {xref}
+    if doc.xref_get_key(xref, "Type") == ("name", "/OCMD"):
+        _, members = doc.xref_get_key(xref, "OCGs")
+        return {int(m) for m in _REF.findall(members) if int(m) in ocg_xrefs}
+    return set()
+
+
+def _resource_entries(doc, xref, key):
+    """Text of the /Resources/<key> dict of object `xref` (inline or indirect), or ''"""
+    kind, value = doc.xref_get_key(xref, f"Resources/{key}")
+    if kind == "xref":
+        return doc.xref_object(int(value.split()[0]), compressed=True)
+    return value if kind == "dict" else ""
+
+
+def _page_ocg_refs(doc, page, ocg_xrefs):
+    """OCG xrefs referenced from a page's /Resources/Properties (directly or via an OCMD)
+
+    Form XObjects in /Resources/XObject are followed recursively, so an OCG
+    that is only used inside a form (its own /Properties or the form's /OC)
+    still counts for the page. Forms already visited are skipped, which
+    also guards against cyclic form references.
+    """
+    used = set()
+    seen = set()
+    pending = [page.xref]
+    while pending:
+        xref = pending.pop()
+        for ref in _REF.findall(_resource_entries(doc, xref, "Properties")):
+            used |= _ocg_members(doc, int(ref), ocg_xrefs)
+        for ref in _REF.findall(_resource_entries(doc, xref, "XObject")):
+            form = int(ref)
+            if form in seen or doc.xref_get_key(form, "Subtype") != ("name", "/Form"):
+                continue
+            seen.add(form)
+            kind, value = doc.xref_get_key(form, "OC")
+            if kind == "xref":
+                used |= _ocg_members(doc, int(value.split()[0]), ocg_xrefs)
+            pending.append(form)
+    return used
+
+
+def build_index(doc):
+    """Scan a document once and return its layer index"""
+    ocgs = doc.get_ocgs()
+    layers = {}
+    for xref, info in ocgs.items():
+        name = (info.get('name') or '').strip()
+        key = name.upper()
+        if key and key not in layers:
+            layers[key] = {'name': name, 'xref': xref, 'pages': []}
+
+    by_xref = {entry['xref']: entry for entry in layers.values()}
+    for page in doc:
+        for xref in sorted(_page_ocg_refs(doc, page, by_xref)):
+            by_xref[xref]['pages'].append(page.number + 1)
+
+    return {'version': INDEX_VERSION, 'page_count': len(doc), 'layers': layers}
+
+
+def load_index(path, doc=None, index_dir=DEFAULT_INDEX_DIR, rebuild=False):
+    """Return the cached index for `path`, building and storing it on a miss"""
+    digest = source_digest(path, index_dir)
+    index_file = os.path.join(index_dir, f"{digest}.json")
+
+    if not rebuild:
+        try:
+            with open(index_file) as f:
+                index = json.load(f)
+            if index.get('version') == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+
+    own_doc = doc is None
+    if own_doc:
+        doc = fitz.open(path, filetype="pdf")
+    try:
+        index = build_index(doc)
+    finally:
+        if own_doc:
+            doc.close()
+    index['sha256'] = digest
+
+    os.makedirs(index_dir, exist_ok=True)
+    _write_json(index_file, index)
+    return index
+
+
+def layer_xrefs(index):
+    """Upper-cased layer name -> xref mapping for LayerRenderer"""
+    return {key: entry['xref'] for key, entry in index['layers'].items()}
+
+
+def layer_pages(index, name):
+    """1-based pages on which a layer has content"""
+    return index['layers'][name.strip().upper()]['pages']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or show the cached layer index of a source file")
+    parser.add_argument("source")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+
+    index = load_index(args.source, index_dir=args.index_dir, rebuild=args.rebuild)
+
+    print("=" * 70)
+    print(f"Layer Index - {os.path.basename(args.source)}")
+    print("=" * 70)
+    print(f"\nsha256: {index['sha256']}")
+    print(f"Pages:  {index['page_count']}\n")
+    for key, entry in sorted(index['layers'].items()):
+        pages = ", ".join(str(p) for p in entry['pages']) or "none"
+        print(f"  {entry['name']:<20} xref {entry['xref']:<6} pages: {pages}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
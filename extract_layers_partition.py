@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Content-stream layer partitioner.
+
+Tokenizes a page's content stream once and splits it on /OC ... BDC / EMC
+marked-content boundaries (and on Form XObjects that carry their own /OC).
+Each layer is then rendered from a content stream holding only its own
+operators plus the unmarked, shared ones, so a sparse layer like TEXTURE
+no longer pays for painting BACKGROUND and TYPE. Content nested inside
+another layer's block is hidden too, which keeps TYPE out of BACKGROUND.
+
+Hidden content still changes the graphics state when its layer is toggled
+off (q/Q, cm, colours, gs, text state and clipping all apply; only painting
+is skipped), so hidden segments are not dropped whole: suppress_painting()
+removes their fills, strokes, shadings, images and XObjects, and shows
+their text in an invisible or clip-only render mode.
+"""
+
+import sys
+import os
+import re
+import time
+import argparse
+
+import fitz
+
+from extract_layers_engine import (
+    DEFAULT_AI_FILE,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_PAGE,
+    DEFAULT_ZOOM,
+    DEFAULT_LAYERS,
+    layer_filename,
+    open_renderer,
+)
+
+_WHITESPACE = b'\x00\t\n\x0c\r '
+_REGULAR = re.compile(rb'[^\x00\t\n\x0c\r ()<>\[\]{}/%]+')
+_WS = re.compile(rb'[\x00\t\n\x0c\r ]+')
+_NUMBER = re.compile(rb'[+-]?(\d+\.?\d*|\.\d+)')
+_INLINE_IMAGE_DATA = re.compile(rb'[\x00\t\n\x0c\r ]ID[\x00\t\n\x0c\r ]')
+_INLINE_IMAGE_END = re.compile(rb'[\x00\t\n\x0c\r ]EI(?=[\x00\t\n\x0c\r ]|$)')
+_REF = re.compile(rb'(\d+)\s+0\s+R')
+_NAMED_REF = re.compile(r'/([^\s/<>\[\]()]+)\s*(\d+)\s+0\s+R')
+_BDC_OC = re.compile(rb'/OC\s*(/[^\x00\t\n\x0c\r ()<>\[\]{}/%]+|<<.*>>)\s*BDC$', re.S)
+_DO_NAME = re.compile(rb'/([^\x00\t\n\x0c\r ()<>\[\]{}/%]+)\s*Do$')
+_RENDER_MODE = re.compile(rb'(\d+)\s*Tr$')
+
+PATH_CONSTRUCTION = {"m", "l", "c", "v", "y", "h", "re"}
+PATH_PAINTING = {"S", "s", "f", "F", "f*", "B", "B*", "b", "b*", "n"}
+CLIPPING = {"W", "W*"}
+TEXT_SHOWING = {"Tj", "TJ", "'", '"'}
+# Painting with no effect on the graphics state (Do runs forms inside q/Q)
+OTHER_PAINTING = {"sh", "Do", "BI"}
+
+
+def tokenize_operators(data):
+    """Yield (operator, start, end) for every operator; start is the end of the previous one
+
+    Each data[start:end] slice holds one operator together with its operands,
+    so concatenating any subset of slices in order yields a valid stream.
+    Inline images (BI ... ID ... EI) are returned as a single "BI" operator.
+    """
+    n = len(data)
+    pos = 0
+    start = 0
+    while pos < n:
+        c = data[pos]
+        if c in _WHITESPACE:
+            pos = _WS.match(data, pos).end()
+        elif c == 0x25:  # % comment
+            eol = data.find(b'\n', pos)
+            cr = data.find(b'\r', pos)
+            ends = [e for e in (eol, cr) if e != -1]
+            pos = min(ends) if ends else n
+        elif c == 0x28:  # ( literal string
+            pos = _skip_literal_string(data, pos)
+        elif c == 0x3c:  # < hex string or << dict
+            if data.startswith(b'<<', pos):
+                pos += 2
+            else:
+                end = data.find(b'>', pos)
+                pos = n if end == -1 else end + 1
+        elif c == 0x3e:  # >>
+            pos += 2 if data.startswith(b'>>', pos) else 1
+        elif c in b'[]{}':
+            pos += 1
+        elif c == 0x2f:  # /name
+            match = _REGULAR.match(data, pos + 1)
+            pos = match.end() if match else pos + 1
+        else:
+            match = _REGULAR.match(data, pos)
+            if match is None:
+                # Stray delimiter, e.g. an unbalanced ")"
+                pos += 1
+                continue
+            word = match.group(0)
+            pos = match.end()
+            if _NUMBER.fullmatch(word) or word in (b'true', b'false', b'null', b'R'):
+                # Operands ("R" only shows up inside inline property dicts)
+                continue
+            if word == b'BI':
+                pos = _skip_inline_image(data, pos)
+            yield word.decode('latin-1'), start, pos
+            start = pos
+    if start < n:
+        # Trailing whitespace/comments without an operator
+        yield None, start, n
+
+
+def _skip_literal_string(data, pos):
+    depth = 0
+    n = len(data)
+    while pos < n:
+        c = data[pos]
+        if c == 0x5c:  # backslash escape
+            pos += 2
+            continue
+        if c == 0x28:
+            depth += 1
+        elif c == 0x29:
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    return n
+
+
+def render_mode(instruction):
+    """Operand of a Tr instruction, or None if it can't be read"""
+    match = _RENDER_MODE.search(instruction.rstrip())
+    return None if match is None else int(match.group(1))
+
+
+def suppress_painting(data, operators, hidden, text_only=False):
+    """Content stream in which the operators `hidden` selects paint nothing
+
+    `operators` yields (op, key, start, end) over `data`; hidden(key) says
+    whether an operator is hidden. Hidden operators keep their effect on
+    the graphics state, as with optional content toggled off: paths that
+    end in W/W* still clip (their painting becomes n), and hidden text is
+    shown in render mode 3 (invisible), or 7 (clip only) when its mode
+    clips, so text positions and text clips are unchanged. Fills, strokes,
+    shadings, images and XObjects are removed. With text_only, only text
+    is suppressed. Returns (stream, text operators hidden, of which clip).
+    """
+    parts = []
+    modes = [0]  # text render mode per q level (it is graphics state)
+    path = []
+    clip = False
+    hidden_text = clip_text = 0
+    for op, key, start, end in operators:
+        instruction = data[start:end]
+        if op == "q":
+            modes.append(modes[-1])
+        elif op == "Q":
+            if len(modes) > 1:
+                modes.pop()
+        elif op == "Tr":
+            mode = render_mode(instruction)
+            if mode is not None:
+                modes[-1] = mode
+
+        if not hidden(key) or (text_only and op not in TEXT_SHOWING):
+            parts.append(instruction)
+        elif op in TEXT_SHOWING:
+            mode = modes[-1]
+            invisible = 7 if mode >= 4 else 3
+            hidden_text += 1
+            clip_text += mode >= 4
+            if mode == invisible:
+                parts.append(instruction)
+            else:
+                parts += [b"\n%d Tr" % invisible, instruction, b"\n%d Tr" % mode]
+        elif op in PATH_CONSTRUCTION:
+            path.append(instruction)
+        elif op in CLIPPING:
+            path.append(instruction)
+            clip = True
+        elif op in PATH_PAINTING:
+            if clip:
+                parts += path + [b"\nn"]
+            path = []
+            clip = False
+        elif op not in OTHER_PAINTING:
+            parts.append(instruction)
+    return b''.join(parts + path), hidden_text, clip_text
+
+
+def _skip_inline_image(data, pos):
+    """Skip from just after BI to just after the matching EI"""
+    id_match = _INLINE_IMAGE_DATA.search(data, pos)
+    if not id_match:
+        return len(data)
+    end = _INLINE_IMAGE_END.search(data, id_match.end())
+    return len(data) if not end else end.end()
+
+
+class ContentPartition:
+    """One page's content stream, split into segments keyed by their OC groups
+
+    A segment's key is a tuple of OCG xref sets, one per enclosing /OC
+    scope; the segment is visible when every set intersects the visible
+    layers. Unmarked (shared) content has the empty key.
+    """
+
+    def __init__(self, doc, page_no):
+        self.doc = doc
+        self.page_no = page_no
+        page = doc[page_no]
+        self.data = page.read_contents()
+        self._properties = self._resource_refs(page.xref, "Resources/Properties")
+        self._xobjects = self._resource_refs(page.xref, "Resources/XObject")
+        self._xobject_groups = {}
+        self._ocg_xrefs = set(doc.get_ocgs())
+        self._operator_list = None
+        self.segments = self._split()
+
+    def _resource_refs(self, page_xref, key):
+        kind, value = self.doc.xref_get_key(page_xref, key)
+        if kind == "xref":
+            value = self.doc.xref_object(int(value.split()[0]), compressed=True)
+        elif kind != "dict":
+            return {}
+        return {name: int(xref) for name, xref in _NAMED_REF.findall(value)}
+
+    def _groups_for(self, xref):
+        """OC groups (any-of xref sets) for an OCG/OCMD xref; () if it can't be expressed"""
+        if xref in self._ocg_xrefs:
+            return (frozenset([xref]),)
+        if self.doc.xref_get_key(xref, "Type") != ("name", "/OCMD"):
+            return ()
+        _, members = self.doc.xref_get_key(xref, "OCGs")
+        ocgs = frozenset(int(m) for m in _REF.findall(members.encode('latin-1')))
+        _, policy = self.doc.xref_get_key(xref, "P")
+        if policy in ("null", "/AnyOn"):
+            return (ocgs,)
+        if policy == "/AllOn":
+            return tuple(frozenset([x]) for x in sorted(ocgs))
+        # AnyOff/AllOff/visibility expressions: leave to the OC config
+        return ()
+
+    def _bdc_groups(self, instruction):
+        match = _BDC_OC.search(instruction.rstrip())
+        if not match:
+            return None
+        operand = match.group(1)
+        if operand.startswith(b'/'):
+            xref = self._properties.get(operand[1:].decode('latin-1'))
+            return () if xref is None else self._groups_for(xref)
+        ocgs = frozenset(int(x) for x in _REF.findall(operand))
+        return (ocgs,) if ocgs else ()
+
+    def _do_groups(self, instruction):
+        match = _DO_NAME.search(instruction.rstrip())
+        if not match:
+            return ()
+        name = match.group(1).decode('latin-1')
+        if name not in self._xobject_groups:
+            groups = ()
+            xref = self._xobjects.get(name)
+            if xref:
+                kind, value = self.doc.xref_get_key(xref, "OC")
+                if kind == "xref":
+                    groups = self._groups_for(int(value.split()[0]))
+            self._xobject_groups[name] = groups
+        return self._xobject_groups[name]
+
+    def operators(self):
+        """Yield (operator, key, start, end) for every operator in the stream"""
+        data = self.data
+        stack = []  # per marked-content level: tuple of OC groups (possibly empty)
+
+        def current():
+            return tuple(g for level in stack for g in level)
+
+        for op, start, end in tokenize_operators(data):
+            if op in ("BDC", "BMC"):
+                groups = self._bdc_groups(data[start:end]) if op == "BDC" else None
+                stack.append(groups or ())
+                yield op, current(), start, end
+            elif op == "EMC":
+                key = current()
+                if stack:
+                    stack.pop()
+                yield op, key, start, end
+            elif op == "Do":
+                yield op, current() + self._do_groups(data[start:end]), start, end
+            else:
+                yield op, current(), start, end
+
+    def _operators(self):
+        if self._operator_list is None:
+            self._operator_list = list(self.operators())
+        return self._operator_list
+
+    def _split(self):
+        segments = []
+        for _, key, start, end in self._operators():
+            if segments and segments[-1][0] == key and segments[-1][2] == start:
+                segments[-1] = (key, segments[-1][1], end)
+            else:
+                segments.append((key, start, end))
+        return segments
+
+    @staticmethod
+    def is_visible(key, visible):
+        return all(group & visible for group in key)
+
+    def layer_stream(self, visible, include_shared=True):
+        """Content stream that paints only what is visible when exactly `visible` xrefs are on
+
+        Hidden segments keep their graphics state operators (see
+        suppress_painting). Without include_shared, unmarked content is
+        dropped whole.
+        """
+        visible = frozenset(visible)
+        if include_shared:
+            segments = self.segments
+        else:
+            segments = [(key, start, end) for key, start, end in self.segments if key]
+        if all(self.is_visible(key, visible) for key, _, _ in segments):
+            return b''.join(self.data[start:end] for _, start, end in segments)
+        operators = ((op, key, start, end) for op, key, start, end in self._operators()
+                     if key or include_shared)
+        hidden = lambda key: not self.is_visible(key, visible)
+        return suppress_painting(self.data, operators, hidden)[0]
+
+    def layer_sizes(self):
+        """Bytes of content owned by each OCG xref (segments under that OCG)"""
+        sizes = {}
+        for key, start, end in self.segments:
+            for xref in set().union(*key) if key else (None,):
+                sizes[xref] = sizes.get(xref, 0) + end - start
+        return sizes
+
+
+class PartitionedRenderer:
+    """Renders layers from per-layer content streams built by ContentPartition"""
+
+    def __init__(self, renderer, include_shared=True):
+        self.renderer = renderer
+        self.doc = renderer.doc
+        self.include_shared = include_shared
+        self._partitions = {}
+        self._stream_xref = None
+
+    def partition(self, page_no):
+        if page_no not in self._partitions:
+            self._partitions[page_no] = ContentPartition(self.doc, page_no)
+        return self._partitions[page_no]
+
+    def _scratch_xref(self):
+        if self._stream_xref is None:
+            self._stream_xref = self.doc.get_new_xref()
+            self.doc.update_object(self._stream_xref, "<<>>")
+        return self._stream_xref
+
+    def render(self, page_no, layers, zoom=DEFAULT_ZOOM, alpha=True, clip=None):
+        """Render `layers` from a content stream that only holds their operators"""
+        visible = self.renderer.show_only(layers)
+        stream = self.partition(page_no).layer_stream(visible, self.include_shared)
+
+        page = self.doc[page_no]
+        original = self.doc.xref_get_key(page.xref, "Contents")
+        xref = self._scratch_xref()
+        self.doc.update_stream(xref, stream)
+        self.doc.xref_set_key(page.xref, "Contents", f"{xref} 0 R")
+        try:
+            page = self.doc.reload_page(page)
+            return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=alpha, clip=clip)
+        finally:
+            self.doc.xref_set_key(page.xref, "Contents", original[1])
+            self.doc.reload_page(page)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render layers from partitioned content streams")
+    parser.add_argument("source", nargs="?", default=DEFAULT_AI_FILE)
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--page", type=int, default=DEFAULT_PAGE, help="1-based artboard/page number")
+    parser.add_argument("--layer", "-l", action="append", dest="layers",
+                        help="layer name to export (repeatable)")
+    parser.add_argument("--zoom", type=float, default=DEFAULT_ZOOM)
+    parser.add_argument("--prefix", default="special-one")
+    parser.add_argument("--no-shared", action="store_true",
+                        help="drop content that isn't marked with any layer")
+    args = parser.parse_args(argv)
+
+    layers = args.layers or list(DEFAULT_LAYERS)
+
+    print("=" * 70)
+    print(f"Partitioned Layer Extraction - Artboard {args.page}")
+    print("=" * 70)
+    print(f"\nSource: {args.source}")
+    print(f"Output: {args.output}\n")
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+
+    os.makedirs(args.output, exist_ok=True)
+
+    with open_renderer(args.source) as renderer:
+        if not 1 <= args.page <= renderer.page_count:
+            print(f"❌ ERROR: Page {args.page} out of range (1-{renderer.page_count})")
+            return False
+        page_no = args.page - 1
+        partitioned = PartitionedRenderer(renderer, include_shared=not args.no_shared)
+
+        start = time.perf_counter()
+        part = partitioned.partition(page_no)
+        print(f"✓ Tokenized {len(part.data):,} bytes into {len(part.segments)} segments "
+              f"in {time.perf_counter() - start:.3f}s")
+        names = {xref: name for name, xref in renderer.layers.items()}
+        for xref, size in sorted(part.layer_sizes().items(), key=lambda kv: -kv[1]):
+            print(f"  {names.get(xref, 'shared' if xref is None else xref):<20} {size:,} bytes")
+        print()
+
+        ok = True
+        for layer in layers:
+            start = time.perf_counter()
+            try:
+                pix = partitioned.render(page_no, [layer], zoom=args.zoom)
+            except KeyError as e:
+                print(f"  ❌ {layer}: {e.args[0]}")
+                ok = False
+                continue
+            path = os.path.join(args.output, layer_filename(args.prefix, layer))
+            pix.save(path)
+            print(f"  ✓ {layer.upper()}: {path} ({pix.width}x{pix.height}px, "
+                  f"{time.perf_counter() - start:.2f}s)")
+
+    print("\n" + "=" * 70)
+    print("✅ SUCCESS" if ok else "⚠️  PARTIAL SUCCESS")
+    print("=" * 70)
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
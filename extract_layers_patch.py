@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+"""
+Object-level OCProperties patcher.
+
+Memory-maps the source, follows the xref table (classic tables, xref
+streams and object streams) to the catalog's /OCProperties /D dictionary
+and appends a rewritten copy of just that object as an incremental update.
+Patch cost scales with the size of the object, not the file: the original
+bytes are never read into Python, and the output is either the source
+itself (--in-place) or a kernel-level copy of it.
+"""
+
+import sys
+import os
+import re
+import mmap
+import shutil
+import struct
+import zlib
+import argparse
+
+_WS_RE = re.compile(rb'(?:[\x00\t\n\x0c\r ]+|%[^\r\n]*)+')
+_TOKEN_RE = re.compile(rb'[^\x00\t\n\x0c\r ()<>\[\]{}/%]+')
+_INT_RE = re.compile(rb'[+-]?\d+')
+_OBJ_HEADER = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj')
+_STARTXREF = re.compile(rb'startxref\s+(\d+)')
+_REF_TAIL = re.compile(rb'[\x00\t\n\x0c\r ]+(\d+)[\x00\t\n\x0c\r ]+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])')
+_SUBSECTION = re.compile(rb'(\d+)\s+(\d+)')
+
+
+class PatchError(Exception):
+    pass
+
+
+class Ref(tuple):
+    """Indirect reference (num, gen)"""
+
+    def __new__(cls, num, gen=0):
+        return super().__new__(cls, (num, gen))
+
+    @property
+    def num(self):
+        return self[0]
+
+    def pdf(self):
+        return f"{self[0]} {self[1]} R"
+
+
+class Name(str):
+    pass
+
+
+class PdfDict(dict):
+    """Parsed dictionary that remembers where each entry sits in the buffer"""
+
+    def __init__(self):
+        super().__init__()
+        self.spans = {}   # key -> (start of /Key, end of value)
+        self.span = None  # (start of <<, end of >>)
+
+
+def _skip_ws(buf, pos):
+    match = _WS_RE.match(buf, pos)
+    return match.end() if match else pos
+
+
+def parse_value(buf, pos):
+    """Parse one PDF object at pos; returns (value, end)"""
+    pos = _skip_ws(buf, pos)
+    c = buf[pos:pos + 1]
+    if buf[pos:pos + 2] == b'<<':
+        result = PdfDict()
+        start = pos
+        pos += 2
+        while True:
+            pos = _skip_ws(buf, pos)
+            if buf[pos:pos + 2] == b'>>':
+                result.span = (start, pos + 2)
+                return result, pos + 2
+            key_start = pos
+            key, pos = parse_value(buf, pos)
+            if not isinstance(key, Name):
+                raise PatchError(f"Dictionary key expected at {key_start}")
+            value, pos = parse_value(buf, pos)
+            result[key] = value
+            result.spans[key] = (key_start, pos)
+    if c == b'[':
+        items = []
+        pos += 1
+        while True:
+            pos = _skip_ws(buf, pos)
+            if buf[pos:pos + 1] == b']':
+                return items, pos + 1
+            item, pos = parse_value(buf, pos)
+            items.append(item)
+    if c == b'/':
+        match = _TOKEN_RE.match(buf, pos + 1)
+        end = match.end() if match else pos + 1
+        return Name(bytes(buf[pos + 1:end]).decode('latin-1')), end
+    if c == b'(':
+        depth = 0
+        start = pos
+        while True:
+            ch = buf[pos:pos + 1]
+            if not ch:
+                raise PatchError("Unterminated string")
+            if ch == b'\\':
+                pos += 2
+                continue
+            if ch == b'(':
+                depth += 1
+            elif ch == b')':
+                depth -= 1
+                if depth == 0:
+                    return _decode_literal(bytes(buf[start + 1:pos])), pos + 1
+            pos += 1
+    if c == b'<':
+        end = buf.find(b'>', pos)
+        hex_digits = re.sub(rb'[^0-9A-Fa-f]', b'', bytes(buf[pos + 1:end]))
+        if len(hex_digits) % 2:
+            hex_digits += b'0'
+        return bytes.fromhex(hex_digits.decode()), end + 1
+    match = _TOKEN_RE.match(buf, pos)
+    if not match:
+        raise PatchError(f"Unexpected byte {c!r} at {pos}")
+    token = bytes(match.group(0))
+    end = match.end()
+    if _INT_RE.fullmatch(token):
+        # Look ahead for "gen R"
+        ref_match = _REF_TAIL.match(buf, end)
+        if ref_match:
+            return Ref(int(token), int(ref_match.group(1))), ref_match.end()
+        return int(token), end
+    if token in (b'true', b'false'):
+        return token == b'true', end
+    if token == b'null':
+        return None, end
+    try:
+        return float(token), end
+    except ValueError:
+        return token.decode('latin-1'), end  # keyword (obj, stream, R, ...)
+
+
+def _decode_literal(raw):
+    escapes = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+    out = bytearray()
+    i = 0
+    while i < len(raw):
+        ch = raw[i:i + 1]
+        if ch == b'\\' and i + 1 < len(raw):
+            nxt = raw[i + 1:i + 2]
+            octal = re.match(rb'[0-7]{1,3}', raw[i + 1:i + 4])
+            if octal:
+                out.append(int(octal.group(0), 8) & 0xff)
+                i += 1 + len(octal.group(0))
+                continue
+            if nxt in (b'\n', b'\r'):
+                i += 2
+                continue
+            out += escapes.get(nxt, nxt)
+            i += 2
+            continue
+        out += ch
+        i += 1
+    return bytes(out)
+
+
+def decode_text(value):
+    """PDF text string (bytes) -> str"""
+    if isinstance(value, str):
+        return value
+    if value.startswith(b'\xfe\xff'):
+        return value[2:].decode('utf-16-be', errors='replace')
+    return value.decode('latin-1')
+
+
+def serialize(value):
+    """Serialize a parsed value back to PDF syntax"""
+    if isinstance(value, Ref):
+        return value.pdf()
+    if isinstance(value, Name):
+        return f"/{value}"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return f"{value:g}"
+    if isinstance(value, bytes):
+        return f"<{value.hex()}>"
+    if isinstance(value, list):
+        return "[" + " ".join(serialize(v) for v in value) + "]"
+    if isinstance(value, dict):
+        return "<<" + "".join(f"/{k} {serialize(v)}" for k, v in value.items()) + ">>"
+    return str(value)
+
+
+def _png_unpredict(data, columns):
+    """Undo PNG row predictors (/Predictor >= 10)"""
+    row_len = columns + 1
+    prev = bytearray(columns)
+    out = bytearray()
+    for r in range(0, len(data), row_len):
+        kind = data[r]
+        row = bytearray(data[r + 1:r + row_len])
+        for i in range(len(row)):
+            left = row[i - 1] if i else 0
+            up = prev[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xff
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xff
+            elif kind == 3:
+                row[i] = (row[i] + ((left + up) >> 1)) & 0xff
+            elif kind == 4:
+                upleft = prev[i - 1] if i else 0
+                p = left + up - upleft
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - upleft)
+                pred = left if pa <= pb and pa <= pc else (up if pb <= pc else upleft)
+                row[i] = (row[i] + pred) & 0xff
+        out += row
+        prev = row
+    return bytes(out)
+
+
+class PdfFile:
+    """Read-only, mmap-backed view of a PDF's objects via its xref"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entries = {}  # num -> (1, offset, gen) | (2, objstm_num, index)
+        self._objstm_cache = {}
+        self.trailer = None
+        self.startxref = self._find_startxref()
+        self.xref_is_stream = False
+        self._load_xref_chain(self.startxref)
+
+    def close(self):
+        self.mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _find_startxref(self):
+        tail_start = max(0, len(self.mm) - 2048)
+        matches = list(_STARTXREF.finditer(self.mm, tail_start))
+        if not matches:
+            raise PatchError("startxref not found")
+        return int(matches[-1].group(1))
+
+    def _load_xref_chain(self, offset):
+        seen = set()
+        first = True
+        while offset is not None and offset not in seen:
+            seen.add(offset)
+            pos = _skip_ws(self.mm, offset)
+            section = {}
+            if self.mm[pos:pos + 4] == b'xref':
+                trailer = self._read_xref_table(pos + 4, section)
+                stream_offset = trailer.get('XRefStm')
+                if isinstance(stream_offset, int):
+                    # Hybrid file: the table marks objects that live in object
+                    # streams as free (for old readers); the XRefStm has them
+                    hidden = {}
+                    self._read_xref_stream(stream_offset, hidden)
+                    for num, entry in hidden.items():
+                        if section.get(num, (0,))[0] == 0:
+                            section[num] = entry
+            else:
+                trailer = self._read_xref_stream(pos, section)
+                if first:
+                    self.xref_is_stream = True
+            for num, entry in section.items():
+                self._add(num, entry)
+            if first:
+                self.trailer = trailer
+                first = False
+            offset = trailer.get('Prev')
+
+    def _add(self, num, entry):
+        # Newer sections are read first and win
+        self.entries.setdefault(num, entry)
+
+    def _read_xref_table(self, pos, section):
+        mm = self.mm
+        while True:
+            pos = _skip_ws(mm, pos)
+            if mm[pos:pos + 7] == b'trailer':
+                trailer, _ = parse_value(mm, pos + 7)
+                return trailer
+            header = _SUBSECTION.match(mm, pos)
+            if not header:
+                raise PatchError(f"Bad xref subsection at {pos}")
+            start, count = int(header.group(1)), int(header.group(2))
+            pos = _skip_ws(mm, header.end())
+            for i in range(count):
+                line = bytes(mm[pos:pos + 20])
+                offset, gen, kind = int(line[0:10]), int(line[11:16]), line[17:18]
+                if kind == b'n':
+                    section.setdefault(start + i, (1, offset, gen))
+                else:
+                    section.setdefault(start + i, (0, 0, gen))
+                pos += 20
+
+    def _stream_data(self, stream_dict, data_start):
+        length = stream_dict.get('Length')
+        if isinstance(length, Ref):
+            length = self.get(length.num)
+        raw = self.mm[data_start:data_start + length]
+        filters = stream_dict.get('Filter')
+        filters = filters if isinstance(filters, list) else ([filters] if filters else [])
+        params = stream_dict.get('DecodeParms')
+        params = params[0] if isinstance(params, list) else params
+        for f in filters:
+            if f != 'FlateDecode':
+                raise PatchError(f"Unsupported filter on structural stream: {f}")
+            raw = zlib.decompress(raw)
+        if isinstance(params, dict) and params.get('Predictor', 1) >= 10:
+            raw = _png_unpredict(raw, params.get('Columns', 1))
+        return raw
+
+    def _parse_indirect(self, buf, pos):
+        header = _OBJ_HEADER.match(buf, pos)
+        if not header:
+            raise PatchError(f"No object header at {pos}")
+        value, end = parse_value(buf, header.end())
+        return value, end
+
+    def _stream_start(self, end):
+        pos = _skip_ws(self.mm, end)
+        if self.mm[pos:pos + 6] != b'stream':
+            raise PatchError(f"Stream keyword expected at {pos}")
+        pos += 6
+        if self.mm[pos:pos + 2] == b'\r\n':
+            return pos + 2
+        return pos + 1
+
+    def _read_xref_stream(self, pos, section):
+        stream_dict, end = self._parse_indirect(self.mm, pos)
+        data = self._stream_data(stream_dict, self._stream_start(end))
+        widths = stream_dict['W']
+        index = stream_dict.get('Index', [0, stream_dict['Size']])
+        row = sum(widths)
+        offset = 0
+        for start, count in zip(index[0::2], index[1::2]):
+            for i in range(count):
+                fields = []
+                p = offset
+                for w in widths:
+                    fields.append(int.from_bytes(data[p:p + w], 'big') if w else None)
+                    p += w
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 1:
+                    section.setdefault(start + i, (1, fields[1], fields[2] or 0))
+                elif kind == 2:
+                    section.setdefault(start + i, (2, fields[1], fields[2]))
+                else:
+                    section.setdefault(start + i, (0, 0, fields[2] or 0))
+                offset += row
+        return stream_dict
+
+    def _objstm(self, num):
+        if num not in self._objstm_cache:
+            _, offset, _ = self.entries[num]
+            stream_dict, end = self._parse_indirect(self.mm, offset)
+            data = self._stream_data(stream_dict, self._stream_start(end))
+            numbers = [int(t) for t in data[:stream_dict['First']].split()]
+            self._objstm_cache[num] = (data, stream_dict['First'], numbers)
+        return self._objstm_cache[num]
+
+    def locate(self, num):
+        """(buffer, value start) of an object's value"""
+        entry = self.entries.get(num)
+        if entry is None or entry[0] == 0:
+            raise PatchError(f"Object {num} not found")
+        if entry[0] == 1:
+            header = _OBJ_HEADER.match(self.mm, entry[1])
+            if not header:
+                raise PatchError(f"No object header for {num} at {entry[1]}")
+            return self.mm, header.end()
+        data, first, numbers = self._objstm(entry[1])
+        return data, first + numbers[2 * entry[2] + 1]
+
+    def get(self, num):
+        buf, pos = self.locate(num)
+        return parse_value(buf, pos)[0]
+
+    def resolve(self, value):
+        return self.get(value.num) if isinstance(value, Ref) else value
+
+    def generation(self, num):
+        entry = self.entries.get(num)
+        return entry[2] if entry and entry[0] == 1 else 0
+
+
+def _find_default_config(pdf):
+    """Locate the /D dict: (owning object number, path of keys inside it, D dict)"""
+    root = pdf.trailer.get('Root')
+    if not isinstance(root, Ref):
+        raise PatchError("Trailer has no /Root")
+    catalog = pdf.get(root.num)
+    props = catalog.get('OCProperties')
+    if props is None:
+        raise PatchError("Document has no optional content (/OCProperties)")
+    owner, path = root.num, ['OCProperties']
+    if isinstance(props, Ref):
+        owner, path = props.num, []
+        props = pdf.get(props.num)
+    config = props.get('D')
+    if isinstance(config, Ref):
+        owner, path = config.num, []
+        config = pdf.get(config.num)
+    else:
+        path = path + ['D']
+    return owner, path, config, props
+
+
+def layer_names(pdf):
+    """Upper-cased OCG name -> object number, read object by object"""
+    _, _, _, props = _find_default_config(pdf)
+    names = {}
+    for ref in props.get('OCGs', []):
+        ocg = pdf.resolve(ref)
+        name = decode_text(ocg.get('Name', b'')).strip().upper()
+        if name and name not in names:
+            names[name] = ref.num
+    return names
+
+
+def _patched_object(pdf, owner, path, on, off):
+    """Source text of `owner` with the /D dict's ON/OFF/BaseState entries replaced"""
+    buf, pos = pdf.locate(owner)
+    value, end = parse_value(buf, pos)
+    target = value
+    for key in path:
+        target = target[key]
+    start, stop = target.span
+    body = bytes(buf[start:stop])
+
+    # Drop existing entries (back to front so spans stay valid)
+    remove = sorted((target.spans[k] for k in ('ON', 'OFF', 'BaseState') if k in target.spans),
+                    reverse=True)
+    for key_start, key_end in remove:
+        body = body[:key_start - start] + body[key_end - start:]
+    entries = (f"/BaseState /ON /ON [{' '.join(f'{n} 0 R' for n in on)}]"
+               f" /OFF [{' '.join(f'{n} 0 R' for n in off)}]").encode()
+    body = body[:2] + entries + body[2:]
+
+    obj_start, obj_end = value.span if isinstance(value, PdfDict) else (pos, end)
+    return bytes(buf[obj_start:start]) + body + bytes(buf[stop:obj_end])
+
+
+def _xref_stream_update(new_objects, offsets, trailer, prev, xref_offset, size):
+    """Build an uncompressed xref stream object covering the new objects"""
+    xref_num = size
+    rows = []
+    index = []
+    for num in sorted(list(new_objects) + [xref_num]):
+        index += [num, 1]
+        off = xref_offset if num == xref_num else offsets[num]
+        rows.append(struct.pack('>BIH', 1, off, 0))
+    data = b''.join(rows)
+    entries = {
+        'Type': Name('XRef'),
+        'Size': size + 1,
+        'W': [1, 4, 2],
+        'Index': index,
+        'Prev': prev,
+        'Length': len(data),
+    }
+    for key in ('Root', 'Info', 'ID', 'Encrypt'):
+        if key in trailer:
+            entries[key] = trailer[key]
+    header = f"{xref_num} 0 obj\n{serialize(entries)}\nstream\n".encode()
+    return header + data + b"\nendstream\nendobj\n"
+
+
+def patch_visibility(source, on, dest=None):
+    """Make exactly the `on` layers visible by appending an incremental update
+
+    `on` holds layer names or OCG object numbers. Writes to `dest` (a kernel
+    copy of source is made first) or appends to `source` itself when dest is
+    None. Returns the number of bytes appended.
+    """
+    with PdfFile(source) as pdf:
+        names = layer_names(pdf)
+        owner, path, config, props = _find_default_config(pdf)
+        all_ocgs = [ref.num for ref in props.get('OCGs', []) if isinstance(ref, Ref)]
+        visible = set()
+        for layer in on:
+            if isinstance(layer, int):
+                visible.add(layer)
+            else:
+                key = layer.strip().upper()
+                if key not in names:
+                    raise KeyError(f"Unknown layer {layer!r} (known layers: {', '.join(sorted(names))})")
+                visible.add(names[key])
+        hidden = [n for n in all_ocgs if n not in visible]
+
+        body = _patched_object(pdf, owner, path, sorted(visible), hidden)
+        gen = pdf.generation(owner)
+        trailer = pdf.trailer
+        size = trailer.get('Size', max(pdf.entries) + 1)
+        use_stream = pdf.xref_is_stream
+        prev = pdf.startxref
+        base_length = len(pdf.mm)
+        needs_newline = pdf.mm[base_length - 1:base_length] not in (b'\n', b'\r')
+
+    target = source
+    if dest is not None:
+        shutil.copyfile(source, dest)
+        target = dest
+
+    update = bytearray(b'\n' if needs_newline else b'')
+    obj_offset = base_length + len(update)
+    update += f"{owner} {gen} obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = base_length + len(update)
+
+    if use_stream:
+        update += _xref_stream_update({owner: None}, {owner: obj_offset}, trailer, prev,
+                                      xref_offset, size)
+    else:
+        update += f"xref\n0 1\n0000000000 65535 f \n{owner} 1\n{obj_offset:010d} {gen:05d} n \n".encode()
+        fields = {'Size': size, 'Prev': prev}
+        for key in ('Root', 'Info', 'ID', 'Encrypt'):
+            if key in trailer:
+                fields[key] = trailer[key]
+        update += b"trailer\n" + serialize(fields).encode() + b"\n"
+    update += f"startxref\n{xref_offset}\n%%EOF\n".encode()
+
+    with open(target, 'ab') as f:
+        f.write(update)
+    return len(update)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Set default layer visibility via an incremental update")
+    parser.add_argument("source")
+    parser.add_argument("dest", nargs="?", help="output file (omit with --in-place)")
+    parser.add_argument("--on", action="append", default=[], help="layer to keep visible (repeatable)")
+    parser.add_argument("--in-place", action="store_true", help="append the update to source")
+    args = parser.parse_args(argv)
+
+    if not args.dest and not args.in_place:
+        print("❌ ERROR: Give a destination file or --in-place")
+        return False
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+
+    print("=" * 70)
+    print("OCProperties Patch")
+    print("=" * 70)
+    try:
+        appended = patch_visibility(args.source, args.on, None if args.in_place else args.dest)
+    except (PatchError, KeyError) as e:
+        print(f"\n❌ ERROR: {e.args[0]}")
+        return False
+
+    print(f"\n✓ Visible: {', '.join(l.upper() for l in args.on) or 'none'}")
+    print(f"✓ Appended {appended:,} bytes to {args.source if args.in_place else args.dest}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
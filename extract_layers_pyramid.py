@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Multi-resolution output pyramid from one master render per layer.
+
+Each layer is rendered once at the largest zoom any target needs; every
+other size (1x/2x/3x, or an exact pixel width such as the 1920px video
+canvas) is derived from that master with area-averaging (box) downsampling.
+Pillow premultiplies alpha while resizing RGBA, so transparent edges don't
+pick up dark fringes. A JSON manifest records each output's dimensions and
+byte size.
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import argparse
+
+from PIL import Image
+
+from extract_layers_engine import (
+    DEFAULT_AI_FILE,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_PAGE,
+    layer_filename,
+    open_renderer,
+)
+
+DEFAULT_SCALES = (1, 2, 3)
+DEFAULT_WIDTHS = (1920,)  # lib/video.ts canvas width
+MANIFEST_VERSION = 1
+
+
+def plan_targets(page_width, page_height, scales=DEFAULT_SCALES, widths=DEFAULT_WIDTHS):
+    """(label, width, height) for every requested size, largest first"""
+    targets = {}
+    for scale in scales:
+        width = max(1, round(page_width * scale))
+        targets.setdefault(width, f"{scale:g}x")
+    for width in widths:
+        targets.setdefault(int(width), f"w{int(width)}")
+    planned = []
+    for width, label in targets.items():
+        height = max(1, round(page_height * width / page_width))
+        planned.append((label, width, height))
+    return sorted(planned, key=lambda t: -t[1])
+
+
+def master_zoom(page_width, targets):
+    """Smallest zoom whose render is at least as wide as every target"""
+    widest = max(width for _, width, _ in targets)
+    zoom = widest / page_width
+    # Guard against the rendered width rounding down below the widest target
+    while math.floor(page_width * zoom) < widest:
+        zoom += 1e-6
+    return zoom
+
+
+def pixmap_image(pix):
+    """PIL image sharing the pixmap's samples; keep `pix` alive while it is used"""
+    mode = {1: 'L', 3: 'RGB', 4: 'RGBA'}[pix.n]
+    return Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, 'raw', mode, pix.stride, 1)
+
+
+def derive(master, width, height):
+    """Box-filtered downsample of the master to (width, height)"""
+    if master.size == (width, height):
+        return master
+    return master.resize((width, height), Image.Resampling.BOX)
+
+
+def build_pyramid(renderer, page_no, layers, output_dir, stem, targets, zoom, compress_level=6):
+    """Render one master and write every target size; returns manifest entries"""
+    pix = renderer.render(page_no, layers, zoom=zoom)
+    master = pixmap_image(pix)
+    entries = []
+    for label, width, height in targets:
+        path = os.path.join(output_dir, f"{stem}@{label}.png")
+        derive(master, width, height).save(path, 'PNG', compress_level=compress_level)
+        entries.append({
+            'label': label,
+            'file': os.path.basename(path),
+            'width': width,
+            'height': height,
+            'bytes': os.path.getsize(path),
+        })
+    master_size = {'zoom': round(zoom, 6), 'width': pix.width, 'height': pix.height}
+    del master, pix
+    return master_size, entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render each layer once and derive every output size")
+    parser.add_argument("source", nargs="?", default=DEFAULT_AI_FILE)
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--page", type=int, default=DEFAULT_PAGE, help="1-based artboard/page number")
+    parser.add_argument("--layer", "-l", action="append", dest="layers",
+                        help="layer to export (repeatable, default: all layers combined)")
+    parser.add_argument("--scale", type=float, action="append", dest="scales",
+                        help=f"density relative to the artboard size (repeatable, default: "
+                             f"{', '.join(f'{s:g}' for s in DEFAULT_SCALES)})")
+    parser.add_argument("--width", type=int, action="append", dest="widths",
+                        help=f"exact output width in pixels (repeatable, default: "
+                             f"{', '.join(map(str, DEFAULT_WIDTHS))})")
+    parser.add_argument("--manifest", help="manifest path (default: <output>/<prefix>-manifest.json)")
+    parser.add_argument("--prefix", default="special-one")
+    parser.add_argument("--encode", action="store_true",
+                        help="also encode every output with layer_encoder.py (<prefix>-picture.json)")
+    args = parser.parse_args(argv)
+
+    scales = args.scales or (DEFAULT_SCALES if not args.widths else ())
+    widths = args.widths or (DEFAULT_WIDTHS if not args.scales else ())
+    layer_targets = [[layer] for layer in args.layers] if args.layers else [None]
+    manifest_path = args.manifest or os.path.join(args.output, f"{args.prefix}-manifest.json")
+
+    print("=" * 70)
+    print(f"Layer Output Pyramid - Artboard {args.page}")
+    print("=" * 70)
+    print(f"\nSource: {args.source}")
+    print(f"Output: {args.output}\n")
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+    if any(s <= 0 for s in scales) or any(w <= 0 for w in widths):
+        print("❌ ERROR: Scales and widths must be positive")
+        return False
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest = {'version': MANIFEST_VERSION, 'source': os.path.basename(args.source),
+                'page': args.page, 'layers': {}}
+
+    with open_renderer(args.source) as renderer:
+        if not 1 <= args.page <= renderer.page_count:
+            print(f"❌ ERROR: Page {args.page} out of range (1-{renderer.page_count})")
+            return False
+        rect = renderer.doc[args.page - 1].rect
+        targets = plan_targets(rect.width, rect.height, scales, widths)
+        zoom = master_zoom(rect.width, targets)
+        print(f"Master zoom: {zoom:.4g}x, {len(targets)} sizes per layer\n")
+
+        for layers in layer_targets:
+            layer = layers[0] if layers else None
+            stem, _ = os.path.splitext(layer_filename(args.prefix, layer))
+            start = time.perf_counter()
+            try:
+                master, entries = build_pyramid(renderer, args.page - 1, layers, args.output,
+                                                stem, targets, zoom)
+            except KeyError as e:
+                print(f"  ❌ {e.args[0]}")
+                return False
+            key = layer.upper() if layer else "ALL"
+            manifest['layers'][key] = {'master': master, 'outputs': entries}
+            print(f"  {key} ({time.perf_counter() - start:.2f}s, master {master['width']}x{master['height']}px)")
+            for entry in entries:
+                print(f"    ✓ {entry['file']}: {entry['width']}x{entry['height']}px, "
+                      f"{entry['bytes'] / 1024:.1f} KB")
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"\n✓ Manifest: {manifest_path}")
+
+    if args.encode:
+        from layer_encoder import encode_files, report_line, write_manifest
+
+        print("\n📦 Encoding outputs...")
+        paths = [os.path.join(args.output, entry['file'])
+                 for layer in manifest['layers'].values() for entry in layer['outputs']]
+        encoded = []
+        for result in encode_files(paths, args.output):
+            encoded.append(result)
+            print(f"  ✓ {report_line(result)}")
+        picture_path = os.path.join(args.output, f"{args.prefix}-picture.json")
+        write_manifest(encoded, picture_path)
+        print(f"  ✓ Picture manifest: {picture_path}")
+    print("\n" + "=" * 70)
+    print("✅ SUCCESS")
+    print("=" * 70)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
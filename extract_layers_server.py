@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Resident layer extraction service on localhost HTTP.
+
+Keeps recently used documents open (parsed, with their layer index and
+optional-content config already set up) in an LRU, so a warm render of an
+already-open artboard costs only the rasterization. Clients such as the
+asset build or the Next.js dev server POST JSON jobs and get back either the
+PNG bytes or the path the PNG was written to.
+
+Only local callers are served: the Host and any Origin header must name a
+loopback address, and POST bodies must be sent as application/json, which
+a web page cannot do cross-origin without a preflight this server never
+answers. Output paths are resolved under --output-root (relative ones are
+relative to it); anything outside it is refused. Zoom is capped at
+MAX_ZOOM so one request cannot allocate an unbounded pixmap.
+
+    python extract_layers_server.py serve
+    python extract_layers_server.py render art.ai --layer background -o bg.png
+
+Endpoints:
+    GET  /health   open documents and request counts
+    POST /layers   {"source": path}  -> layer names and page count
+    POST /render   {"source": path, "page": 5, "layers": ["TYPE"] | null,
+                    "zoom": 3, "alpha": true,
+                    "output": optional path, relative to the output root}
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import threading
+import argparse
+import urllib.request
+import urllib.error
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from extract_layers_engine import (
+    DEFAULT_AI_FILE,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_PAGE,
+    DEFAULT_ZOOM,
+    open_renderer,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("LAYER_SERVER_PORT", 8765))
+DEFAULT_MAX_DOCUMENTS = 4
+DEFAULT_OUTPUT_ROOT = os.environ.get("LAYER_SERVER_OUTPUT_ROOT", DEFAULT_OUTPUT_DIR)
+MAX_REQUEST_BYTES = 1 << 20
+MAX_ZOOM = 16.0  # 8x masters plus headroom; a 648pt page is ~10k px square
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+
+class JobError(Exception):
+    """A render/extract job the server cannot run (reported as HTTP 4xx)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class DocumentPool:
+    """LRU of open LayerRenderers keyed on (path, mtime, size)
+
+    An edited source gets a new key, so the stale handle is closed and the
+    file is reopened on its next use.
+    """
+
+    def __init__(self, max_documents=DEFAULT_MAX_DOCUMENTS):
+        self.max_documents = max_documents
+        self._renderers = OrderedDict()
+        self.opens = 0
+        self.hits = 0
+
+    @staticmethod
+    def key(path):
+        path = os.path.realpath(path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            raise JobError(f"File not found: {path}", 404)
+        return path, st.st_mtime_ns, st.st_size
+
+    def get(self, path):
+        """Open renderer for path (caller must hold the render lock)"""
+        key = self.key(path)
+        renderer = self._renderers.get(key)
+        if renderer is not None:
+            self._renderers.move_to_end(key)
+            self.hits += 1
+            return renderer
+
+        for stale in [k for k in self._renderers if k[0] == key[0]]:
+            self._renderers.pop(stale).close()
+        renderer = open_renderer(key[0])
+        self.opens += 1
+        self._renderers[key] = renderer
+        while len(self._renderers) > self.max_documents:
+            _, evicted = self._renderers.popitem(last=False)
+            evicted.close()
+        return renderer
+
+    def paths(self):
+        return [key[0] for key in self._renderers]
+
+    def close(self):
+        while self._renderers:
+            self._renderers.popitem()[1].close()
+
+
+class LayerService:
+    """Runs jobs against the pool; MuPDF is not thread-safe, so renders are serialized"""
+
+    def __init__(self, max_documents=DEFAULT_MAX_DOCUMENTS, output_root=DEFAULT_OUTPUT_ROOT):
+        self.pool = DocumentPool(max_documents)
+        self.output_root = os.path.realpath(output_root)
+        self.lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+
+    def count_request(self):
+        with self._stats_lock:
+            self.requests += 1
+
+    def _page(self, renderer, job):
+        page = job.get('page', DEFAULT_PAGE)
+        if not isinstance(page, int) or isinstance(page, bool):
+            raise JobError(f"'page' must be an integer, got {page!r}")
+        if not 1 <= page <= renderer.page_count:
+            raise JobError(f"Page {page} out of range (1-{renderer.page_count})")
+        return page - 1
+
+    def output_path(self, output):
+        """Absolute path for a job's `output`, which must resolve inside the output root"""
+        if not isinstance(output, str):
+            raise JobError(f"'output' must be a path, got {output!r}")
+        path = os.path.realpath(os.path.join(self.output_root, output))
+        if os.path.commonpath([path, self.output_root]) != self.output_root:
+            raise JobError(f"Output {output} is outside the output root {self.output_root}", 403)
+        return path
+
+    def layers(self, job):
+        with self.lock:
+            renderer = self.pool.get(job['source'])
+            return {'layers': sorted(renderer.layers), 'page_count': renderer.page_count}
+
+    def render(self, job):
+        """Returns (png bytes or None, info dict)"""
+        start = time.perf_counter()
+        layers = job.get('layers')
+        if layers is not None and (not isinstance(layers, list)
+                                   or not all(isinstance(name, str) for name in layers)):
+            raise JobError(f"'layers' must be a list of layer names or null, got {layers!r}")
+        zoom = job.get('zoom', DEFAULT_ZOOM)
+        if (not isinstance(zoom, (int, float)) or isinstance(zoom, bool)
+                or not math.isfinite(zoom) or not 0 < zoom <= MAX_ZOOM):
+            raise JobError(f"'zoom' must be a number in (0, {MAX_ZOOM:g}], got {zoom!r}")
+        zoom = float(zoom)
+        alpha = bool(job.get('alpha', True))
+        output = job.get('output') and self.output_path(job['output'])
+        with self.lock:
+            renderer = self.pool.get(job['source'])
+            page_no = self._page(renderer, job)
+            try:
+                pix = renderer.render(page_no, layers, zoom=zoom, alpha=alpha)
+            except KeyError as e:
+                raise JobError(e.args[0])
+            info = {'width': pix.width, 'height': pix.height}
+            if output:
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                pix.save(output, output="png")
+                data = None
+            else:
+                data = pix.tobytes("png")
+            del pix
+        info['path'] = output
+        info['ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return data, info
+
+    def health(self):
+        return {'documents': self.pool.paths(), 'opens': self.pool.opens,
+                'hits': self.pool.hits, 'requests': self.requests,
+                'output_root': self.output_root}
+
+
+class LayerRequestHandler(BaseHTTPRequestHandler):
+    server_version = "LayerServer/1"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _check_caller(self):
+        """Refuse requests that did not come from a local client (DNS rebinding, cross-site pages)"""
+        host = urlsplit("//" + (self.headers.get("Host") or "")).hostname
+        if host not in LOCAL_HOSTS | {self.server.server_address[0]}:
+            raise JobError(f"Host {self.headers.get('Host')!r} not allowed", 403)
+        origin = self.headers.get("Origin")
+        if origin is not None and urlsplit(origin).hostname not in LOCAL_HOSTS:
+            raise JobError(f"Origin {origin!r} not allowed", 403)
+
+    def _read_job(self):
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            raise JobError("Content-Type must be application/json", 415)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            raise JobError("Request too large", 413)
+        try:
+            job = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise JobError("Request body must be JSON")
+        if not isinstance(job, dict) or not job.get('source'):
+            raise JobError("Missing 'source'")
+        if not isinstance(job['source'], str):
+            raise JobError(f"'source' must be a path, got {job['source']!r}")
+        return job
+
+    def do_GET(self):
+        try:
+            self._check_caller()
+        except JobError as e:
+            return self._send_json({'error': str(e)}, e.status)
+        if self.path != "/health":
+            return self._send_json({'error': f"Unknown endpoint {self.path}"}, 404)
+        self._send_json(self.server.service.health())
+
+    def do_POST(self):
+        service = self.server.service
+        service.count_request()
+        try:
+            self._check_caller()
+            if self.path == "/layers":
+                return self._send_json(service.layers(self._read_job()))
+            if self.path != "/render":
+                raise JobError(f"Unknown endpoint {self.path}", 404)
+            data, info = service.render(self._read_job())
+        except JobError as e:
+            return self._send_json({'error': str(e)}, e.status)
+        except Exception as e:
+            return self._send_json({'error': f"{type(e).__name__}: {e}"}, 500)
+
+        if data is None:
+            return self._send_json(info)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Render-Info", json.dumps(info))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, max_documents=DEFAULT_MAX_DOCUMENTS,
+                verbose=False, output_root=DEFAULT_OUTPUT_ROOT):
+    server = ThreadingHTTPServer((host, port), LayerRequestHandler)
+    server.daemon_threads = True
+    server.service = LayerService(max_documents, output_root)
+    server.verbose = verbose
+    return server
+
+
+def request_render(source, page=DEFAULT_PAGE, layers=None, zoom=DEFAULT_ZOOM, alpha=True,
+                   output=None, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=60):
+    """Client helper: returns PNG bytes, or the server's info dict when `output` is set
+
+    A relative `output` is resolved by the server against its output root.
+    """
+    job = {'source': os.path.abspath(source), 'page': page, 'layers': layers,
+           'zoom': zoom, 'alpha': alpha}
+    if output:
+        job['output'] = output
+    req = urllib.request.Request(f"http://{host}:{port}/render", data=json.dumps(job).encode(),
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            body = resp.read()
+            if resp.headers.get("Content-Type") == "application/json":
+                return json.loads(body)
+            return body
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.loads(e.read()).get('error', str(e))) from None
+
+
+def serve(args):
+    try:
+        server = make_server(args.host, args.port, args.max_documents, args.verbose,
+                             args.output_root)
+    except OSError as e:
+        print(f"❌ ERROR: Cannot listen on {args.host}:{args.port}: {e}")
+        return False
+
+    print("=" * 70)
+    print("Layer Extraction Service")
+    print("=" * 70)
+    print(f"\nListening on http://{args.host}:{args.port} (up to {args.max_documents} open documents)")
+    print(f"Outputs under {server.service.output_root}")
+    print("Press Ctrl+C to stop\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.pool.close()
+    print("\n✓ Stopped")
+    return True
+
+
+def render_client(args):
+    start = time.perf_counter()
+    try:
+        result = request_render(args.source, args.page, args.layers, args.zoom, output=args.output,
+                                host=args.host, port=args.port)
+    except (RuntimeError, urllib.error.URLError) as e:
+        print(f"❌ ERROR: {e}")
+        return False
+    elapsed = (time.perf_counter() - start) * 1000
+    if isinstance(result, dict):
+        print(f"✓ {result['path']} ({result['width']}x{result['height']}px, "
+              f"server {result['ms']:.1f} ms, round trip {elapsed:.1f} ms)")
+    else:
+        sys.stdout.buffer.write(result)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident layer extraction service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="run the service")
+    p.add_argument("--max-documents", type=int, default=DEFAULT_MAX_DOCUMENTS)
+    p.add_argument("--output-root", default=DEFAULT_OUTPUT_ROOT,
+                   help="directory render outputs must stay inside (env LAYER_SERVER_OUTPUT_ROOT)")
+    p.add_argument("--verbose", action="store_true", help="log every request")
+    p.set_defaults(func=serve)
+
+    p = sub.add_parser("render", help="ask a running service for a render")
+    p.add_argument("source", nargs="?", default=DEFAULT_AI_FILE)
+    p.add_argument("--page", type=int, default=DEFAULT_PAGE, help="1-based artboard/page number")
+    p.add_argument("--layer", "-l", action="append", dest="layers",
+                   help="layer to render (repeatable, default: all layers)")
+    p.add_argument("--zoom", type=float, default=DEFAULT_ZOOM)
+    p.add_argument("--output", "-o",
+                   help="PNG path written by the server, relative to its output root "
+                        "(absolute paths must be inside it; default: PNG to stdout)")
+    p.set_defaults(func=render_client)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
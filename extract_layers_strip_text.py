@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Text-free layer rendering by stripping text objects from content streams.
+
+Rewrites the page's content stream (and the Form XObjects it draws) so
+their text-showing operators (Tj, TJ, ', ") paint nothing, then renders
+layers from the rewritten document. The result is a clean vector render
+with no cv2.inpaint pass (EXTRACTION_OPTIONS.md, Option 3). With --only,
+text is removed only where it sits inside the given layer(s), e.g. TYPE.
+
+Colour, gs and text state operators inside text objects outlive ET, so
+the objects are not deleted: each text-showing operator is run in render
+mode 3 (invisible) instead. Text in a clipping mode (Tr 4-7, which may
+have been set by an earlier text object) is run in mode 7, so it still
+clips without painting. Only the in-memory document is rewritten;
+--save-pdf writes a copy of it.
+"""
+
+import sys
+import os
+import time
+import argparse
+
+from extract_layers_engine import (
+    DEFAULT_AI_FILE,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_PAGE,
+    DEFAULT_ZOOM,
+    DEFAULT_LAYERS,
+    layer_filename,
+    open_renderer,
+)
+from extract_layers_partition import ContentPartition, suppress_painting, tokenize_operators
+
+
+def strip_text(data, operators, drop=lambda key: True):
+    """Make a content stream's text invisible, leaving all other operators in place
+
+    `operators` yields (op, key, start, end) over `data`; drop(key) gets the
+    OC key of a text-showing operator and decides whether it goes.
+    Returns (new stream, text operators removed, of which kept as clips).
+    """
+    return suppress_painting(data, operators, drop, text_only=True)
+
+
+def _plain_operators(data):
+    for op, start, end in tokenize_operators(data):
+        yield op, (), start, end
+
+
+def strip_page_text(doc, page_no, only=None):
+    """Rewrite a page (and its forms) without visible text; returns (removed, kept_clip)
+
+    `only` is a set of OCG xrefs: when given, only text marked with one of
+    them is removed, and forms are left alone since their text is not
+    marked at page level.
+    """
+    page = doc[page_no]
+    partition = ContentPartition(doc, page_no)
+
+    if only is None:
+        drop = lambda key: True
+    else:
+        only = frozenset(only)
+        drop = lambda key: any(group & only for group in key)
+
+    stream, removed, kept_clip = strip_text(partition.data, partition.operators(), drop)
+    xref = doc.get_new_xref()
+    doc.update_object(xref, "<<>>")
+    doc.update_stream(xref, stream)
+    doc.xref_set_key(page.xref, "Contents", f"{xref} 0 R")
+
+    if only is None:
+        for form_xref, *_ in page.get_xobjects():
+            data = doc.xref_stream(form_xref)
+            form_stream, n, k = strip_text(data, _plain_operators(data))
+            if n:
+                doc.update_stream(form_xref, form_stream)
+            removed += n
+            kept_clip += k
+
+    doc.reload_page(page)
+    return removed, kept_clip
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render layers with text objects stripped from the content")
+    parser.add_argument("source", nargs="?", default=DEFAULT_AI_FILE)
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--page", type=int, default=DEFAULT_PAGE, help="1-based artboard/page number")
+    parser.add_argument("--layer", "-l", action="append", dest="layers",
+                        help="layer to export (repeatable, default: %s)" % ", ".join(DEFAULT_LAYERS))
+    parser.add_argument("--only", action="append",
+                        help="only strip text inside this layer (repeatable, e.g. TYPE)")
+    parser.add_argument("--reference", action="store_true", help="also export all layers combined")
+    parser.add_argument("--zoom", type=float, default=DEFAULT_ZOOM)
+    parser.add_argument("--save-pdf", help="write the text-free document to this path")
+    parser.add_argument("--prefix", default="special-one")
+    args = parser.parse_args(argv)
+
+    layers = args.layers or list(DEFAULT_LAYERS)
+    targets = [[layer] for layer in layers] + ([None] if args.reference else [])
+
+    print("=" * 70)
+    print(f"Text-Free Layer Rendering - Artboard {args.page}")
+    print("=" * 70)
+    print(f"\nSource: {args.source}")
+    print(f"Output: {args.output}\n")
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+
+    os.makedirs(args.output, exist_ok=True)
+
+    with open_renderer(args.source) as renderer:
+        if not 1 <= args.page <= renderer.page_count:
+            print(f"❌ ERROR: Page {args.page} out of range (1-{renderer.page_count})")
+            return False
+        try:
+            only = None if not args.only else set(renderer.resolve(args.only))
+        except KeyError as e:
+            print(f"❌ ERROR: {e.args[0]}")
+            return False
+
+        start = time.perf_counter()
+        removed, kept_clip = strip_page_text(renderer.doc, args.page - 1, only)
+        renderer.clear_display_lists()
+        scope = "all layers" if only is None else ", ".join(l.upper() for l in args.only)
+        print(f"✓ Removed {removed} text operators ({scope}) in {time.perf_counter() - start:.3f}s")
+        if kept_clip:
+            print(f"  {kept_clip} of them still clip (render mode 7)")
+        print()
+
+        ok = True
+        for target in targets:
+            start = time.perf_counter()
+            try:
+                pix = renderer.render(args.page - 1, target, zoom=args.zoom)
+            except KeyError as e:
+                print(f"  ❌ {e.args[0]}")
+                ok = False
+                continue
+            stem, _ = os.path.splitext(layer_filename(args.prefix, target and target[0]))
+            path = os.path.join(args.output, f"{stem}-no-text.png")
+            pix.save(path)
+            label = target[0].upper() if target else "ALL LAYERS"
+            print(f"  ✓ {label}: {path} ({pix.width}x{pix.height}px, "
+                  f"{time.perf_counter() - start:.2f}s)")
+
+        if args.save_pdf:
+            renderer.doc.save(args.save_pdf, garbage=1, deflate=True)
+            print(f"\n✓ Text-free document: {args.save_pdf}")
+
+    print("\n" + "=" * 70)
+    print("✅ SUCCESS" if ok else "⚠️  PARTIAL SUCCESS")
+    print("=" * 70)
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
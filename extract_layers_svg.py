@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Per-layer SVG export limited to the selected OCGs.
+
+Uses PyMuPDF's SVG device with the engine's optional-content config, so
+each SVG only holds the visible layer's content. Numbers in path data and
+transforms can be rounded to fewer digits (--precision); paths are not
+otherwise simplified (no segments are merged or dropped). Embedded rasters
+are either kept
+inline as data URIs or written next to the SVG (--external-images). Each
+layer's SVG size (raw and gzipped, as a server would send it) is reported
+against the PNG render at --zoom so the smaller format can be picked;
+--write-png keeps those renders as <stem>-svg-ref.png, apart from the
+extraction scripts' layer PNGs.
+"""
+
+import sys
+import os
+import re
+import gzip
+import json
+import base64
+import hashlib
+import argparse
+import itertools
+
+import fitz
+
+from extract_layers_engine import (
+    DEFAULT_AI_FILE,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_PAGE,
+    DEFAULT_ZOOM,
+    DEFAULT_LAYERS,
+    layer_filename,
+    open_renderer,
+)
+
+# Glyph outlines in <defs> are in font units (about 1 per em), so they keep
+# this many more digits than paths in page units
+GLYPH_EXTRA_DIGITS = 3
+# Scale/rotation/skew terms multiply every coordinate, so they are kept to
+# this many significant digits whatever --precision is
+LINEAR_SIGNIFICANT_DIGITS = 6
+
+_NUMBER = re.compile(r'-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?')
+_PATH_ATTR = re.compile(r'(\s(?:d|points)=")([^"]*)(")')
+_TRANSFORM_ATTR = re.compile(r'(\stransform=")([^"]*)(")')
+_TRANSFORM = re.compile(r'([A-Za-z]+)\s*\(([^)]*)\)')
+# Per transform function: indices of the translation operands (the rest are linear)
+_TRANSLATION_OPERANDS = {'matrix': {4, 5}, 'translate': {0, 1}, 'rotate': {1, 2}}
+_DEFS = re.compile(r'<defs>.*?</defs>', re.S)
+_DATA_URI = re.compile(r'(xlink:href|href)="data:image/(png|jpeg|jpg);base64,([^"]*)"')
+
+
+def _format_number(value, digits):
+    text = f"{value:.{digits}f}".rstrip('0').rstrip('.') if digits > 0 else str(round(value))
+    if text in ('-0', ''):
+        return '0'
+    if text.startswith('0.'):
+        return text[1:]
+    if text.startswith('-0.'):
+        return '-' + text[2:]
+    return text
+
+
+def _round_numbers(text, digits):
+    return _NUMBER.sub(lambda m: _format_number(float(m.group(0)), digits), text)
+
+
+def _format_significant(value, digits=LINEAR_SIGNIFICANT_DIGITS):
+    text = f"{value:.{digits}g}"
+    if text.startswith('0.'):
+        return text[1:]
+    if text.startswith('-0.'):
+        return '-' + text[2:]
+    return text
+
+
+def _round_transform(text, digits):
+    """Round a transform list: translations to `digits` places, linear terms to significant digits"""
+    def function(match):
+        translation = _TRANSLATION_OPERANDS.get(match.group(1), set())
+        index = itertools.count()
+
+        def operand(m):
+            value = float(m.group(0))
+            if next(index) in translation:
+                return _format_number(value, digits)
+            return _format_significant(value)
+        return f"{match.group(1)}({_NUMBER.sub(operand, match.group(2))})"
+    return _TRANSFORM.sub(function, text)
+
+
+def round_svg(svg, precision):
+    """Round path coordinates and transform translations to `precision` decimal places
+
+    Only the numbers change; every path segment is kept.
+
+    Linear transform terms (scale, rotation, skew) keep
+    LINEAR_SIGNIFICANT_DIGITS significant digits, since rounding a 0.24
+    scale to page-unit precision could collapse it to 0.
+    """
+    def attrs(fragment, digits):
+        fragment = _PATH_ATTR.sub(
+            lambda m: m.group(1) + _round_numbers(m.group(2), digits) + m.group(3), fragment)
+        return _TRANSFORM_ATTR.sub(
+            lambda m: m.group(1) + _round_transform(m.group(2), digits) + m.group(3), fragment)
+
+    pieces = []
+    pos = 0
+    for match in _DEFS.finditer(svg):
+        pieces.append(attrs(svg[pos:match.start()], precision))
+        pieces.append(attrs(match.group(0), precision + GLYPH_EXTRA_DIGITS))
+        pos = match.end()
+    pieces.append(attrs(svg[pos:], precision))
+    return ''.join(pieces)
+
+
+def externalize_images(svg, output_dir, stem):
+    """Move data-URI images into files next to the SVG; returns (svg, written paths)"""
+    written = {}
+
+    def replace(match):
+        attr, kind, payload = match.groups()
+        data = base64.b64decode(re.sub(r'\s+', '', payload))
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in written:
+            ext = 'png' if kind == 'png' else 'jpg'
+            name = f"{stem}-image{len(written) + 1}.{ext}"
+            with open(os.path.join(output_dir, name), 'wb') as f:
+                f.write(data)
+            written[digest] = name
+        return f'{attr}="{written[digest]}"'
+
+    svg = _DATA_URI.sub(replace, svg)
+    return svg, [os.path.join(output_dir, name) for name in written.values()]
+
+
+def layer_svg(renderer, page_no, layers=None, text_as_path=True):
+    """SVG of a page with only `layers` visible (None = all layers)"""
+    if layers is None:
+        renderer.show_all()
+    else:
+        renderer.show_only(layers)
+    return renderer.doc[page_no].get_svg_image(matrix=fitz.Identity, text_as_path=text_as_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export layers as SVG and compare against PNG")
+    parser.add_argument("source", nargs="?", default=DEFAULT_AI_FILE)
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--page", type=int, default=DEFAULT_PAGE, help="1-based artboard/page number")
+    parser.add_argument("--layer", "-l", action="append", dest="layers",
+                        help="layer to export (repeatable, default: %s)" % ", ".join(DEFAULT_LAYERS))
+    parser.add_argument("--reference", action="store_true", help="also export all layers combined")
+    parser.add_argument("--precision", type=int, help="round path/transform numbers to this many decimals (no other path simplification)")
+    parser.add_argument("--external-images", action="store_true",
+                        help="write embedded rasters as files instead of data URIs")
+    parser.add_argument("--text-as-text", action="store_true",
+                        help="keep text as <text> instead of glyph outlines")
+    parser.add_argument("--zoom", type=float, default=DEFAULT_ZOOM, help="zoom of the PNG to compare against")
+    parser.add_argument("--write-png", action="store_true", help="also save the PNG renders as <stem>-svg-ref.png")
+    parser.add_argument("--report", help="write a JSON size report to this file")
+    parser.add_argument("--prefix", default="special-one")
+    args = parser.parse_args(argv)
+
+    layers = args.layers or list(DEFAULT_LAYERS)
+    targets = [[layer] for layer in layers] + ([None] if args.reference else [])
+
+    print("=" * 70)
+    print(f"Layer SVG Export - Artboard {args.page}")
+    print("=" * 70)
+    print(f"\nSource: {args.source}")
+    print(f"Output: {args.output}\n")
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+
+    os.makedirs(args.output, exist_ok=True)
+    report = []
+    ok = True
+
+    with open_renderer(args.source) as renderer:
+        if not 1 <= args.page <= renderer.page_count:
+            print(f"❌ ERROR: Page {args.page} out of range (1-{renderer.page_count})")
+            return False
+        page_no = args.page - 1
+
+        for target in targets:
+            label = target[0].upper() if target else "ALL LAYERS"
+            stem, _ = os.path.splitext(layer_filename(args.prefix, target and target[0]))
+            try:
+                svg = layer_svg(renderer, page_no, target, text_as_path=not args.text_as_text)
+            except KeyError as e:
+                print(f"  ❌ {e.args[0]}")
+                ok = False
+                continue
+            original = len(svg.encode())
+            if args.precision is not None:
+                svg = round_svg(svg, args.precision)
+            images = []
+            if args.external_images:
+                svg, images = externalize_images(svg, args.output, stem)
+
+            data = svg.encode()
+            svg_path = os.path.join(args.output, f"{stem}.svg")
+            with open(svg_path, 'wb') as f:
+                f.write(data)
+            image_bytes = sum(os.path.getsize(p) for p in images)
+            svg_bytes = len(data) + image_bytes
+            svg_gzip = len(gzip.compress(data, 9)) + image_bytes
+
+            pix = renderer.render(page_no, target, zoom=args.zoom)
+            png = pix.tobytes("png")
+            if args.write_png:
+                with open(os.path.join(args.output, f"{stem}-svg-ref.png"), 'wb') as f:
+                    f.write(png)
+
+            smaller = 'svg' if svg_gzip < len(png) else 'png'
+            report.append({
+                'layer': label,
+                'svg': os.path.basename(svg_path),
+                'svg_bytes': svg_bytes,
+                'svg_gzip_bytes': svg_gzip,
+                'svg_unrounded_bytes': original,
+                'external_images': [os.path.basename(p) for p in images],
+                'png_bytes': len(png),
+                'png_size': [pix.width, pix.height],
+                'smaller': smaller,
+            })
+            print(f"  ✓ {label}: {svg_path}")
+            note = f" (was {original / 1024:.1f} KB)" if args.precision is not None else ""
+            print(f"    SVG {svg_bytes / 1024:.1f} KB{note}, gzip {svg_gzip / 1024:.1f} KB"
+                  + (f", {len(images)} external images" if images else ""))
+            print(f"    PNG {len(png) / 1024:.1f} KB at {pix.width}x{pix.height}px -> {smaller.upper()} is smaller")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report: {args.report}")
+
+    print("\n" + "=" * 70)
+    print("✅ SUCCESS" if ok else "⚠️  PARTIAL SUCCESS")
+    print("=" * 70)
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
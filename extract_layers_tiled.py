@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Tiled, bounded-memory layer rendering for high-zoom exports (6x/8x masters).
+
+The page is rendered as full-width horizontal bands (clip rectangles) and
+each band's rows are streamed straight into a PNG (or raw) encoder, so the
+full-resolution pixmap never exists in memory. Peak memory is set with
+--max-mem. The bands replay the renderer's cached display list, so the page
+content is interpreted once however many bands there are.
+
+Each band is rendered with a few halo rows that are cropped off, because
+anti-aliasing on the clip edge itself can differ from a full render. Band
+cuts are also placed between text spans: MuPDF rasterizes large glyphs
+against the clip, so a cut through a glyph changes its anti-aliasing. With
+both in place the streamed rows are identical to a full render, and
+encode_png() gives byte-identical files for both paths. --max-mem is a hard
+limit: a text span taller than a band is cut through, and only those rows
+may then differ from a full render.
+"""
+
+import sys
+import os
+import zlib
+import struct
+import argparse
+
+import fitz
+
+from extract_layers_engine import (
+    DEFAULT_AI_FILE,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_PAGE,
+    DEFAULT_ZOOM,
+    layer_filename,
+    open_renderer,
+    parse_size,
+)
+from layer_raw import EXTENSION, RawLayerWriter
+
+DEFAULT_MAX_MEM = "256M"
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}  # channels -> PNG color type
+IDAT_CHUNK_SIZE = 1 << 16
+
+# Memory per band: the band pixmap plus the encoder's working set
+BAND_OVERHEAD = 2
+# Extra rows rendered above and below each band, then discarded
+HALO_ROWS = 2
+
+
+class PngStreamWriter:
+    """Writes an 8-bit PNG row by row with a streaming zlib compressor"""
+
+    def __init__(self, f, width, height, channels, level=6):
+        if channels not in PNG_COLOR_TYPES:
+            raise ValueError(f"Unsupported channel count: {channels}")
+        self.f = f
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        self._zlib = zlib.compressobj(level)
+        self._pending = bytearray()
+
+        f.write(PNG_SIGNATURE)
+        ihdr = struct.pack(">IIBBBBB", width, height, 8, PNG_COLOR_TYPES[channels], 0, 0, 0)
+        self._chunk(b'IHDR', ihdr)
+
+    def _chunk(self, kind, data):
+        self.f.write(struct.pack(">I", len(data)))
+        self.f.write(kind)
+        self.f.write(data)
+        self.f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xffffffff))
+
+    def _flush_idat(self, final=False):
+        while len(self._pending) >= IDAT_CHUNK_SIZE or (final and self._pending):
+            data = bytes(self._pending[:IDAT_CHUNK_SIZE])
+            del self._pending[:IDAT_CHUNK_SIZE]
+            self._chunk(b'IDAT', data)
+
+    def write_rows(self, buffer, stride, rows):
+        """Append `rows` rows from a buffer laid out with `stride` bytes per row"""
+        mv = memoryview(buffer).cast('B')
+        row_bytes = self.width * self.channels
+        for r in range(rows):
+            start = r * stride
+            self._pending += self._zlib.compress(b'\x00')  # filter type None
+            self._pending += self._zlib.compress(mv[start:start + row_bytes])
+            self._flush_idat()
+        self.rows_written += rows
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG expects {self.height} rows, got {self.rows_written}")
+        self._pending += self._zlib.flush()
+        self._flush_idat(final=True)
+        self._chunk(b'IEND', b'')
+
+
+class RawStreamWriter:
+    """Writes bare, tightly packed pixel rows"""
+
+    def __init__(self, f, width, height, channels):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+
+    def write_rows(self, buffer, stride, rows):
+        mv = memoryview(buffer).cast('B')
+        row_bytes = self.width * self.channels
+        if stride == row_bytes:
+            self.f.write(mv[:rows * stride])
+        else:
+            for r in range(rows):
+                self.f.write(mv[r * stride:r * stride + row_bytes])
+        self.rows_written += rows
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"Raw output expects {self.height} rows, got {self.rows_written}")
+
+
+WRITERS = {'png': PngStreamWriter, 'raw': RawStreamWriter, 'layer': RawLayerWriter}
+EXTENSIONS = {'png': '.png', 'raw': '.rgba', 'layer': EXTENSION}
+
+
+def encode_png(pix, path, level=6):
+    """Encode a whole pixmap with the same encoder the tiled path uses"""
+    with open(path, 'wb') as f:
+        writer = PngStreamWriter(f, pix.width, pix.height, pix.n, level)
+        writer.write_rows(pix.samples_mv, pix.stride, pix.height)
+        writer.close()
+
+
+def text_row_spans(page, matrix, height, y_offset=0):
+    """Device rows covered by text on the page, as merged (start, end) intervals
+
+    Only text in currently visible layers is traced, so set the layer
+    visibility first.
+    """
+    spans = []
+    for span in page.get_texttrace():
+        bbox = fitz.Rect(span['bbox'])
+        margin = span['size'] * 0.25
+        bbox.y0 -= margin
+        bbox.y1 += margin
+        device = bbox * matrix
+        start = max(0, int(device.y0) - 2 - y_offset)
+        end = min(height, int(device.y1) + 3 - y_offset)
+        if start < end:
+            spans.append((start, end))
+
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def plan_bands(height, band_rows, blocked=()):
+    """Split [0, height) into bands of at most band_rows, avoiding cuts inside blocked spans
+
+    A cut that falls inside a span moves up to the span's start. A span
+    that already starts at (or above) the top of the band does not fit in
+    one band, so it is cut through at band_rows.
+    """
+    bands = []
+    y = 0
+    while y < height:
+        end = min(height, y + band_rows)
+        for start, stop in blocked:
+            if start < end < stop:
+                if start > y:
+                    end = start
+                break
+        bands.append((y, end))
+        y = end
+    return bands
+
+
+def render_tiled(renderer, page_no, layers, out, zoom=DEFAULT_ZOOM, alpha=True,
+                 max_mem=parse_size(DEFAULT_MAX_MEM), fmt='png'):
+    """Render a page band by band into `out` (a path or binary file object)"""
+    page = renderer.doc[page_no]
+    matrix = fitz.Matrix(zoom, zoom)
+    irect = (page.rect * matrix).irect
+    width, height = irect.width, irect.height
+    channels = 4 if alpha else 3
+
+    row_cost = width * channels * BAND_OVERHEAD
+    band_rows = max(1, min(height, max_mem // row_cost - 2 * HALO_ROWS))
+    # The text trace follows layer visibility, which the previous render left
+    if layers is None:
+        renderer.show_all()
+    else:
+        renderer.show_only(layers)
+    bands = plan_bands(height, band_rows, text_row_spans(page, matrix, height, irect.y0))
+
+    own_file = isinstance(out, (str, os.PathLike))
+    f = open(out, 'wb') if own_file else out
+    try:
+        writer = WRITERS[fmt](f, width, height, channels)
+        inverse = ~matrix
+        for y0, y1 in bands:
+            top = max(0, y0 - HALO_ROWS)
+            bottom = min(height, y1 + HALO_ROWS)
+            clip = fitz.Rect(irect.x0, irect.y0 + top, irect.x1, irect.y0 + bottom) * inverse
+            pix = renderer.render(page_no, layers, zoom=zoom, alpha=alpha, clip=clip)
+            if (pix.width, pix.height) != (width, bottom - top):
+                raise RuntimeError(f"Band {top}-{bottom} rendered as {pix.irect}, expected "
+                                   f"{width}x{bottom - top}")
+            skip = (y0 - top) * pix.stride
+            writer.write_rows(pix.samples_mv[skip:], pix.stride, y1 - y0)
+            del pix
+        writer.close()
+    finally:
+        if own_file:
+            f.close()
+
+    peak_band = max(y1 - y0 for y0, y1 in bands) + 2 * HALO_ROWS
+    return {
+        'width': width,
+        'height': height,
+        'bands': len(bands),
+        'peak_band_bytes': peak_band * width * channels,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render layers at high zoom with bounded memory")
+    parser.add_argument("source", nargs="?", default=DEFAULT_AI_FILE)
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--page", type=int, default=DEFAULT_PAGE, help="1-based artboard/page number")
+    parser.add_argument("--layer", "-l", action="append", dest="layers",
+                        help="layer name to export (repeatable, default: all layers)")
+    parser.add_argument("--zoom", type=float, default=DEFAULT_ZOOM)
+    parser.add_argument("--max-mem", default=DEFAULT_MAX_MEM,
+                        help="peak memory for band buffers, e.g. 256M")
+    parser.add_argument("--format", choices=sorted(WRITERS), default='png')
+    parser.add_argument("--prefix", default="special-one")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print(f"Tiled Layer Rendering - Artboard {args.page} @ {args.zoom:g}x")
+    print("=" * 70)
+    print(f"\nSource: {args.source}")
+    print(f"Output: {args.output}\n")
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+
+    try:
+        max_mem = parse_size(args.max_mem)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        return False
+
+    os.makedirs(args.output, exist_ok=True)
+    targets = [[layer] for layer in args.layers] if args.layers else [None]
+
+    with open_renderer(args.source) as renderer:
+        if not 1 <= args.page <= renderer.page_count:
+            print(f"❌ ERROR: Page {args.page} out of range (1-{renderer.page_count})")
+            return False
+        for layers in targets:
+            name = layer_filename(args.prefix, layers[0] if layers else None)
+            stem, _ = os.path.splitext(name)
+            path = os.path.join(args.output, f"{stem}@{args.zoom:g}x{EXTENSIONS[args.format]}")
+            try:
+                stats = render_tiled(renderer, args.page - 1, layers, path, zoom=args.zoom,
+                                     max_mem=max_mem, fmt=args.format)
+            except KeyError as e:
+                print(f"  ❌ {e.args[0]}")
+                return False
+            print(f"  ✓ {path}")
+            print(f"    {stats['width']}x{stats['height']}px in {stats['bands']} bands, "
+                  f"peak band {stats['peak_band_bytes'] / (1 << 20):.1f} MB")
+
+    print("\n" + "=" * 70)
+    print("✅ SUCCESS")
+    print("=" * 70)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
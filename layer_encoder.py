@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Output encoder stage for extracted and cleaned layers.
+
+PNG is lossless at every compression level, so the compress_level=0 the
+old scripts used only made files bigger. Each image here is encoded with
+several candidates in parallel: PNG levels, lossless WebP, and AVIF, whose
+YUV conversion makes it lossy. Every candidate is decoded again. Lossless
+candidates must match exactly on visible pixels (alpha > 0). Lossy ones are
+accepted when their PSNR is at least --min-psnr. The smallest accepted
+encode per format is written when it beats the PNG fallback, and a
+manifest lists them for <picture>/srcset. Files named like
+extract_layers_pyramid.py outputs (stem@label.png) are grouped into one
+srcset per stem.
+
+Formats this Pillow build cannot save are skipped, and a candidate whose
+encoder fails is reported and skipped rather than ending the run.
+Outputs are written to a temporary file and moved into place, so an input
+that is rewritten as its own PNG output is replaced, not truncated. A
+file hard-linked to it elsewhere keeps its old contents.
+"""
+
+import sys
+import os
+import io
+import glob
+import json
+import time
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+# Encoders can fail on odd inputs or builds; anything else is a bug
+ENCODE_ERRORS = (OSError, ValueError, KeyError)
+
+MANIFEST_VERSION = 1
+DEFAULT_MIN_PSNR = 40.0  # dB over premultiplied RGBA; "visually lossless"
+
+# format -> (Pillow format, MIME type, extension)
+FORMATS = {
+    'png': ('PNG', 'image/png', '.png'),
+    'webp': ('WEBP', 'image/webp', '.webp'),
+    'avif': ('AVIF', 'image/avif', '.avif'),
+}
+
+DEFAULT_CANDIDATES = [
+    ('png', {'compress_level': 6}),
+    ('png', {'compress_level': 9, 'optimize': True}),
+    ('webp', {'lossless': True, 'quality': 80, 'method': 4}),
+    ('avif', {'quality': 90, 'subsampling': '4:4:4'}),
+    ('avif', {'quality': 75, 'subsampling': '4:4:4'}),
+]
+# About 8% smaller than method 4 on the cover art, but 15x the encode time
+SLOW_CANDIDATES = [
+    ('webp', {'lossless': True, 'quality': 100, 'method': 6}),
+]
+
+
+def available_candidates(candidates):
+    """Candidates whose format this Pillow build can save"""
+    Image.init()
+    return [c for c in candidates if FORMATS[c[0]][0] in Image.SAVE]
+
+
+def candidate_label(fmt, options):
+    return f"{fmt}(" + ", ".join(f"{k}={v}" for k, v in sorted(options.items())) + ")"
+
+
+def visible_psnr(a, b):
+    """PSNR of two RGBA arrays with colour premultiplied by alpha (hidden pixels don't count)"""
+    def premultiplied(x):
+        x = x.astype(np.float32)
+        x[..., :3] *= x[..., 3:] / 255.0
+        return x
+    mse = float(np.mean((premultiplied(a) - premultiplied(b)) ** 2))
+    return float('inf') if mse == 0 else float(10 * np.log10(255.0 ** 2 / mse))
+
+
+def encode(image, fmt, options):
+    """(encoded bytes, seconds) for a PIL image"""
+    buf = io.BytesIO()
+    start = time.perf_counter()
+    image.save(buf, FORMATS[fmt][0], **options)
+    return buf.getvalue(), time.perf_counter() - start
+
+
+_source = (None, None, None)
+
+
+def _load(path):
+    """RGBA image and array of `path`, cached per process (jobs arrive grouped by file)"""
+    global _source
+    if _source[0] != path:
+        with Image.open(path) as img:
+            image = img.convert('RGBA')
+        _source = (path, image, np.asarray(image))
+    return _source[1], _source[2]
+
+
+def _encode_job(job):
+    path, fmt, options, min_psnr = job
+    image, array = _load(path)
+    try:
+        data, seconds = encode(image, fmt, options)
+        with Image.open(io.BytesIO(data)) as decoded:
+            psnr = visible_psnr(array, np.asarray(decoded.convert('RGBA')))
+    except ENCODE_ERRORS as e:
+        return {'input': path, 'format': fmt, 'options': options, 'bytes': None, 'seconds': 0.0,
+                'psnr': None, 'accepted': False, 'data': None, 'error': f"{type(e).__name__}: {e}"}
+    accepted = psnr == float('inf') or (min_psnr is not None and psnr >= min_psnr)
+    return {
+        'input': path,
+        'format': fmt,
+        'options': options,
+        'bytes': len(data),
+        'seconds': seconds,
+        'psnr': None if psnr == float('inf') else round(psnr, 2),
+        'accepted': accepted,
+        'data': data if accepted else None,
+    }
+
+
+def _write_file(target, data=None, source=None):
+    """Write bytes (or a copy of source) to target through a temp file and os.replace"""
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        if data is None:
+            shutil.copyfile(source, tmp)
+        else:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def finish_file(path, encodes, output_dir):
+    """Write the smallest accepted encode per format; returns the file's summary"""
+    with Image.open(path) as img:
+        width, height = img.size
+        is_png = img.format == 'PNG'
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if is_png:
+        # The source itself is a valid PNG candidate (it may be better optimized)
+        encodes.append({'input': path, 'format': 'png', 'options': {'source': True},
+                        'bytes': os.path.getsize(path), 'seconds': 0.0, 'psnr': None,
+                        'accepted': True, 'data': None})
+
+    best = {}
+    for e in encodes:
+        if e['accepted'] and (e['format'] not in best or e['bytes'] < best[e['format']]['bytes']):
+            best[e['format']] = e
+    fallback = best['png']['bytes']
+
+    outputs = {}
+    for fmt, e in sorted(best.items(), key=lambda item: item[1]['bytes']):
+        if fmt != 'png' and e['bytes'] >= fallback:
+            continue
+        target = os.path.join(output_dir, stem + FORMATS[fmt][2])
+        if e['data'] is None:
+            if os.path.realpath(target) != os.path.realpath(path):
+                _write_file(target, source=path)
+        else:
+            _write_file(target, e['data'])
+        outputs[fmt] = {'file': os.path.basename(target), 'type': FORMATS[fmt][1],
+                        'bytes': e['bytes'], 'encoder': candidate_label(fmt, e['options']),
+                        'lossless': e['psnr'] is None}
+    for e in encodes:
+        e.pop('data', None)
+        e.pop('input', None)
+    return {
+        'input': path,
+        'width': width,
+        'height': height,
+        'source_bytes': os.path.getsize(path),
+        'best': min(outputs, key=lambda fmt: outputs[fmt]['bytes']),
+        'outputs': outputs,
+        'encodes': sorted(encodes, key=lambda e: (e['bytes'] is None, e['bytes'] or 0)),
+    }
+
+
+def encode_files(paths, output_dir=None, candidates=DEFAULT_CANDIDATES, min_psnr=DEFAULT_MIN_PSNR,
+                 workers=None):
+    """Yield each file's summary as soon as all of its candidates are encoded
+
+    Lossy candidates are only accepted when min_psnr is not None. Outputs go
+    to output_dir, or next to each input. Candidates in formats Pillow
+    cannot save are dropped.
+    """
+    workers = workers or os.cpu_count() or 1
+    candidates = available_candidates(candidates)
+    remaining = {path: len(candidates) for path in paths}
+    encodes = {path: [] for path in paths}
+    jobs = [(path, fmt, options, min_psnr) for path in paths for fmt, options in candidates]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_encode_job, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            path = result['input']
+            encodes[path].append(result)
+            remaining[path] -= 1
+            if not remaining[path]:
+                directory = output_dir or os.path.dirname(os.path.abspath(path))
+                yield finish_file(path, encodes.pop(path), directory)
+
+
+def group_key(path):
+    """Asset name shared by pyramid outputs: 'stem@2x.png' -> 'stem'"""
+    return os.path.splitext(os.path.basename(path))[0].split('@')[0]
+
+
+def build_manifest(results, url_prefix=""):
+    """<picture> manifest: per asset, a PNG fallback and one srcset per smaller format"""
+    groups = {}
+    for result in results:
+        groups.setdefault(group_key(result['input']), []).append(result)
+
+    assets = {}
+    for name, files in sorted(groups.items()):
+        files.sort(key=lambda r: r['width'])
+        # A format only gets a <source> when every size has it
+        formats = set.intersection(*(set(r['outputs']) for r in files))
+        sources = []
+        for fmt in sorted(formats - {'png'},
+                          key=lambda fmt: sum(r['outputs'][fmt]['bytes'] for r in files)):
+            sources.append({
+                'type': FORMATS[fmt][1],
+                'srcset': ", ".join(f"{url_prefix}{r['outputs'][fmt]['file']} {r['width']}w"
+                                    for r in files),
+                'bytes': [r['outputs'][fmt]['bytes'] for r in files],
+            })
+        largest = files[-1]
+        assets[name] = {
+            'width': largest['width'],
+            'height': largest['height'],
+            'src': url_prefix + largest['outputs']['png']['file'],
+            'srcset': ", ".join(f"{url_prefix}{r['outputs']['png']['file']} {r['width']}w"
+                                for r in files),
+            'sources': sources,
+        }
+    return {'version': MANIFEST_VERSION, 'assets': assets}
+
+
+def write_manifest(results, path, url_prefix=""):
+    manifest = build_manifest(results, url_prefix)
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def report_line(result):
+    """One line per asset: chosen format, bytes against the source, encode time"""
+    best = result['outputs'][result['best']]
+    seconds = sum(e['seconds'] for e in result['encodes'])
+    failed = sum(1 for e in result['encodes'] if e.get('error'))
+    return (f"{os.path.basename(result['input'])}: {result['source_bytes'] / 1024:.0f} KB -> "
+            f"{best['file']} {best['bytes'] / 1024:.0f} KB ({best['encoder']}), "
+            f"encode {seconds:.2f}s" + (f", {failed} candidates failed" if failed else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Encode layers as PNG/WebP/AVIF and write a <picture> manifest")
+    parser.add_argument("inputs", nargs="+", help="image paths or globs")
+    parser.add_argument("--output", "-o", help="output directory (default: next to each input)")
+    parser.add_argument("--manifest", help="manifest path (default: <output>/picture-manifest.json)")
+    parser.add_argument("--url-prefix", default="", help="prefix for manifest URLs, e.g. /images/layers/")
+    parser.add_argument("--min-psnr", type=float, default=DEFAULT_MIN_PSNR,
+                        help="accept lossy encodes at or above this PSNR (dB)")
+    parser.add_argument("--lossless", action="store_true", help="only accept exact encodes")
+    parser.add_argument("--format", action="append", dest="formats", choices=sorted(FORMATS),
+                        help="formats to try (repeatable, default: all)")
+    parser.add_argument("--slow", action="store_true", help="also try the slowest, smallest WebP setting")
+    parser.add_argument("--workers", "-j", type=int, default=None)
+    parser.add_argument("--report", help="write per-asset encode details as JSON to this file")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("Layer Encoder")
+    print("=" * 70)
+
+    paths = []
+    for pattern in args.inputs:
+        paths.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing or not paths:
+        print(f"❌ ERROR: File not found: {', '.join(missing) or ' '.join(args.inputs)}")
+        return False
+
+    formats = set(args.formats or FORMATS) | {'png'}
+    candidates = DEFAULT_CANDIDATES + (SLOW_CANDIDATES if args.slow else [])
+    candidates = [c for c in candidates if c[0] in formats]
+    skipped = sorted({c[0] for c in candidates} - {c[0] for c in available_candidates(candidates)})
+    if skipped:
+        print(f"\n⚠️  Pillow cannot save {', '.join(s.upper() for s in skipped)}; skipping")
+    candidates = available_candidates(candidates)
+    min_psnr = None if args.lossless else args.min_psnr
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    print(f"\n{len(paths)} files x {len(candidates)} candidates, "
+          f"{'lossless only' if min_psnr is None else f'lossy >= {min_psnr:g} dB'}\n")
+    start = time.perf_counter()
+    results = []
+    for result in encode_files(paths, args.output, candidates, min_psnr, args.workers):
+        results.append(result)
+        print(f"  ✓ {report_line(result)}")
+    elapsed = time.perf_counter() - start
+
+    manifest_path = args.manifest or os.path.join(
+        args.output or os.path.dirname(os.path.abspath(paths[0])), "picture-manifest.json")
+    write_manifest(results, manifest_path, args.url_prefix)
+    print(f"\n✓ Manifest: {manifest_path}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Report: {args.report}")
+
+    source = sum(r['source_bytes'] for r in results)
+    best = sum(r['outputs'][r['best']]['bytes'] for r in results)
+    print("\n" + "=" * 70)
+    print(f"✅ {source / 1024:.0f} KB -> {best / 1024:.0f} KB smallest per asset in {elapsed:.2f}s")
+    print("=" * 70)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Raw layer container for intermediate buffers.
+
+Passing layers between extraction and cleanup as PNGs costs a full encode
+and decode per hop, and decoding a 6x/8x layer loads all of it into RAM.
+A .lraw file is a small header followed by uncompressed rows:
+
+    offset  size  field
+    0       8     magic b"LAYERRAW"
+    8       4     version (1)
+    12      4     width
+    16      4     height
+    20      4     channels (1, 3 or 4; uint8 samples)
+    24      4     stride (bytes per row, >= width * channels)
+    28      4     data offset (page aligned)
+
+All fields are little-endian. Pixel data starts on a 4096-byte boundary.
+Readers open it as np.memmap, so workers touch only the rows they slice
+and share pages through the OS cache. The tiled renderer writes it row
+band by row band (--format layer).
+"""
+
+import sys
+import os
+import struct
+import argparse
+
+import numpy as np
+from PIL import Image
+
+MAGIC = b"LAYERRAW"
+VERSION = 1
+HEADER = struct.Struct("<8sIIIIII")
+DATA_ALIGNMENT = 4096
+EXTENSION = ".lraw"
+MODES = {1: 'L', 3: 'RGB', 4: 'RGBA'}
+
+
+def is_layer_file(path):
+    return str(path).endswith(EXTENSION)
+
+
+def data_offset():
+    return -(-HEADER.size // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+
+def pack_header(width, height, channels, stride=None):
+    """Header bytes, padded to the data offset"""
+    if channels not in MODES:
+        raise ValueError(f"Unsupported channel count: {channels}")
+    stride = stride or width * channels
+    if stride < width * channels:
+        raise ValueError(f"Stride {stride} is shorter than a row ({width * channels} bytes)")
+    offset = data_offset()
+    header = HEADER.pack(MAGIC, VERSION, width, height, channels, stride, offset)
+    return header + b'\0' * (offset - len(header))
+
+
+def read_header(path):
+    """{'width', 'height', 'channels', 'stride', 'offset'} of a layer file"""
+    with open(path, 'rb') as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size or data[:8] != MAGIC:
+        raise ValueError(f"{path}: not a raw layer file")
+    _, version, width, height, channels, stride, offset = HEADER.unpack(data)
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported raw layer version {version}")
+    expected = offset + stride * height
+    if os.path.getsize(path) < expected:
+        raise ValueError(f"{path}: truncated ({os.path.getsize(path)} of {expected} bytes)")
+    return {'width': width, 'height': height, 'channels': channels, 'stride': stride,
+            'offset': offset}
+
+
+def open_layer(path, mode='r'):
+    """(height, width, channels) uint8 view of a layer file's pixels over np.memmap
+
+    mode is np.memmap's: 'r' read-only, 'r+' write through, 'c' copy-on-write.
+    """
+    h = read_header(path)
+    rows = np.memmap(path, dtype=np.uint8, mode=mode, offset=h['offset'],
+                     shape=(h['height'], h['stride']))
+    pixels = rows[:, :h['width'] * h['channels']]
+    return pixels.reshape(h['height'], h['width'], h['channels'])
+
+
+def create_layer(path, width, height, channels=4, stride=None):
+    """New zero-filled layer file, returned writable (mode 'r+') for workers to fill"""
+    header = pack_header(width, height, channels, stride)
+    stride = stride or width * channels
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.truncate(len(header) + stride * height)
+    return open_layer(path, 'r+')
+
+
+class RawLayerWriter:
+    """Streams rows into a layer file; same interface as the tiled renderer's writers"""
+
+    def __init__(self, f, width, height, channels, stride=None):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.stride = stride or width * channels
+        self.rows_written = 0
+        f.write(pack_header(width, height, channels, self.stride))
+        self._padding = b'\0' * (self.stride - width * channels)
+
+    def write_rows(self, buffer, stride, rows):
+        """Append `rows` rows from a buffer laid out with `stride` bytes per row"""
+        mv = memoryview(buffer).cast('B')
+        row_bytes = self.width * self.channels
+        if stride == row_bytes == self.stride:
+            self.f.write(mv[:rows * stride])
+        else:
+            for r in range(rows):
+                self.f.write(mv[r * stride:r * stride + row_bytes])
+                if self._padding:
+                    self.f.write(self._padding)
+        self.rows_written += rows
+
+    def close(self):
+        if self.rows_written != self.height:
+            raise ValueError(f"Raw layer expects {self.height} rows, got {self.rows_written}")
+
+
+def write_layer(path, array):
+    """Write an (h, w[, c]) uint8 array as a layer file"""
+    array = array if array.ndim == 3 else array[..., None]
+    height, width, channels = array.shape
+    with open(path, 'wb') as f:
+        writer = RawLayerWriter(f, width, height, channels)
+        writer.write_rows(np.ascontiguousarray(array), width * channels, height)
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and convert raw layer files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="print layer file headers")
+    info.add_argument("paths", nargs="+")
+    convert = sub.add_parser("convert", help="PNG -> .lraw or .lraw -> PNG (by output extension)")
+    convert.add_argument("input")
+    convert.add_argument("output")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("Raw Layer Files")
+    print("=" * 70 + "\n")
+
+    paths = args.paths if args.command == "info" else [args.input]
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"❌ ERROR: File not found: {path}")
+            return False
+
+    try:
+        if args.command == "info":
+            for path in args.paths:
+                h = read_header(path)
+                print(f"  {path}: {h['width']}x{h['height']}px, {h['channels']} channels, "
+                      f"stride {h['stride']}, data at {h['offset']}, "
+                      f"{os.path.getsize(path) / 2**20:.1f} MB")
+        elif is_layer_file(args.output):
+            with Image.open(args.input) as img:
+                if img.mode not in MODES.values():
+                    img = img.convert('RGBA')
+                write_layer(args.output, np.asarray(img))
+            print(f"  ✓ {args.output}")
+        else:
+            pixels = open_layer(args.input)
+            mode = MODES[pixels.shape[2]]
+            array = pixels[..., 0] if mode == 'L' else pixels
+            Image.fromarray(np.ascontiguousarray(array), mode).save(args.output)
+            print(f"  ✓ {args.output}")
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        return False
+
+    print("\n" + "=" * 70)
+    print("✅ Complete!")
+    print("=" * 70)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Batch text removal over many layer PNGs.
+
+Inputs are globs and/or manifests (extract_layers_pyramid.py manifests, or
+a plain JSON list of paths, relative to the manifest). Each file runs
+remove_text_pipeline's detection and inpainting in a process pool. The
+number of files in flight is capped by a memory budget: each file's
+footprint is estimated from its header as width x height x channels x
+pipeline copies, and a file is only started when its estimate fits next
+to the ones already running. Smaller files may overtake a large one that
+does not fit yet, but only --max-skips times; after that nothing else
+starts until it does. Progress streams as files finish, and a JSON
+summary records mask coverage, runtime and output sizes per file.
+Inputs that would write the same output name (same basename, one output
+directory) are prefixed with their parent directory name.
+"""
+
+import sys
+import os
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import cv2
+from PIL import Image
+
+from extract_layers_engine import parse_size
+from layer_encoder import encode_files, report_line, write_manifest
+from layer_raw import is_layer_file, read_header
+from remove_text_pipeline import (
+    DEFAULT_RADIUS,
+    INPAINT_METHODS,
+    detect_text_mask,
+    inpaint_rgba,
+    load_rgba,
+    save_png,
+)
+
+DEFAULT_MEMORY_BUDGET = "2G"
+CHANNELS = 4  # everything is processed as RGBA
+# Full-size arrays alive at the peak of one file: decoded image, RGBA copy,
+# gray + masks, RGB inpaint input and output; each extra method adds its
+# inpaint output and RGBA result
+PIPELINE_COPIES = 5
+COPIES_PER_EXTRA_METHOD = 2
+OUTPUT_SUFFIXES = ("-no-text", "-no-text-ns", "-text-mask")
+# Times the oldest pending file may be overtaken before the queue waits for it
+DEFAULT_MAX_SKIPS = 4
+
+
+def is_output(path):
+    """True for files this script writes, so re-runs over a glob skip them"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem.endswith(OUTPUT_SUFFIXES)
+
+
+def manifest_files(path):
+    """Image paths listed by a manifest, resolved against its directory"""
+    with open(path) as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    if isinstance(manifest, dict):
+        names = [entry['file'] for layer in manifest.get('layers', {}).values()
+                 for entry in layer.get('outputs', [])]
+    else:
+        names = [entry['file'] if isinstance(entry, dict) else entry for entry in manifest]
+    return [os.path.join(base, name) for name in names]
+
+
+def collect_inputs(patterns, manifests=()):
+    """Unique input paths from globs and manifests, in order"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(p for p in matches if not is_output(p))
+    for manifest in manifests:
+        paths.extend(manifest_files(manifest))
+    seen = set()
+    unique = []
+    for path in paths:
+        key = os.path.realpath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def estimate_bytes(width, height, methods=1, copies=PIPELINE_COPIES):
+    """Peak memory of one file through the pipeline"""
+    copies += COPIES_PER_EXTRA_METHOD * max(0, methods - 1)
+    return width * height * CHANNELS * copies
+
+
+def output_stems(paths, output_dir=None):
+    """Output name stem per input, unique within each output directory"""
+    def target(path, stem):
+        return os.path.join(output_dir or os.path.dirname(os.path.abspath(path)), stem)
+
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    counts = {}
+    for path, stem in zip(paths, stems):
+        counts[target(path, stem)] = counts.get(target(path, stem), 0) + 1
+    taken = set()
+    unique = []
+    for path, stem in zip(paths, stems):
+        if counts[target(path, stem)] > 1:
+            parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+            stem = f"{parent}-{stem}" if parent else stem
+        candidate, n = stem, 2
+        while target(path, candidate) in taken:
+            candidate, n = f"{stem}-{n}", n + 1
+        taken.add(target(path, candidate))
+        unique.append(candidate)
+    return unique
+
+
+def plan_files(paths, output_dir=None, methods=('telea',), copies=PIPELINE_COPIES):
+    """(jobs, errors): one job per readable image with its size, memory estimate and output stem"""
+    jobs, errors = [], []
+    for path, stem in zip(paths, output_stems(paths, output_dir)):
+        try:
+            if is_layer_file(path):
+                header = read_header(path)
+                width, height = header['width'], header['height']
+            else:
+                with Image.open(path) as img:
+                    width, height = img.size
+        except (OSError, ValueError) as e:
+            errors.append({'input': path, 'error': str(e)})
+            continue
+        jobs.append({
+            'input': path,
+            'output_dir': output_dir or os.path.dirname(os.path.abspath(path)),
+            'stem': stem,
+            'width': width,
+            'height': height,
+            'estimate': estimate_bytes(width, height, len(methods), copies),
+        })
+    return jobs, errors
+
+
+def _init_worker():
+    cv2.setNumThreads(1)
+
+
+def clean_file(job, methods=('telea',), radius=DEFAULT_RADIUS, save_mask=False):
+    """Detect and inpaint one file; returns its summary entry"""
+    start = time.perf_counter()
+    rgba = load_rgba(job['input'])
+    mask, detector = detect_text_mask(rgba)
+    stem = job['stem']
+    outputs = []
+    for method in methods:
+        suffix = "" if method == 'telea' else f"-{method}"
+        path = os.path.join(job['output_dir'], f"{stem}-no-text{suffix}.png")
+        save_png(inpaint_rgba(rgba, mask, radius, method), path)
+        outputs.append({'method': method, 'path': path, 'bytes': os.path.getsize(path)})
+    if save_mask:
+        path = os.path.join(job['output_dir'], f"{stem}-text-mask.png")
+        cv2.imwrite(path, mask)
+        outputs.append({'method': 'mask', 'path': path, 'bytes': os.path.getsize(path)})
+    return {
+        'input': job['input'],
+        'width': job['width'],
+        'height': job['height'],
+        'estimate': job['estimate'],
+        'detector': detector,
+        'coverage': cv2.countNonZero(mask) / mask.size,
+        'outputs': outputs,
+        'seconds': time.perf_counter() - start,
+        'pid': os.getpid(),
+    }
+
+
+def run_batch(jobs, budget, workers=None, max_skips=DEFAULT_MAX_SKIPS, **options):
+    """Yield (job, result or exception) as files finish, within the memory budget
+
+    The first pending file whose estimate fits next to the running ones
+    starts; a file larger than the whole budget runs on its own. Once the
+    oldest pending file has been overtaken max_skips times, nothing else
+    starts until it fits, so large files are not postponed indefinitely.
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = list(jobs)
+    running = {}
+    in_use = 0
+    skips = 0  # times pending[0] has been overtaken
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        while pending or running:
+            while pending and len(running) < workers:
+                candidates = pending[:1] if skips >= max_skips else pending
+                index = next((i for i, job in enumerate(candidates)
+                              if in_use + job['estimate'] <= budget), None)
+                if index is None:
+                    if running:
+                        break
+                    index = 0
+                if index:
+                    skips += 1
+                else:
+                    skips = 0
+                job = pending.pop(index)
+                running[pool.submit(clean_file, job, **options)] = job
+                in_use += job['estimate']
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                in_use -= job['estimate']
+                try:
+                    yield job, future.result()
+                except Exception as e:
+                    yield job, e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove text from many layer PNGs in parallel")
+    parser.add_argument("inputs", nargs="*", help="image paths or globs")
+    parser.add_argument("--manifest", "-m", action="append", default=[],
+                        help="manifest listing images (repeatable)")
+    parser.add_argument("--output", "-o", help="output directory (default: next to each input)")
+    parser.add_argument("--method", action="append", dest="methods", choices=sorted(INPAINT_METHODS),
+                        help="inpainting algorithm (repeatable, default: telea)")
+    parser.add_argument("--radius", type=int, default=DEFAULT_RADIUS)
+    parser.add_argument("--save-mask", action="store_true")
+    parser.add_argument("--workers", "-j", type=int, default=None)
+    parser.add_argument("--memory", default=DEFAULT_MEMORY_BUDGET,
+                        help="memory budget for files in flight, e.g. 4G")
+    parser.add_argument("--copies", type=int, default=PIPELINE_COPIES,
+                        help="full-size RGBA copies assumed per file")
+    parser.add_argument("--max-skips", type=int, default=DEFAULT_MAX_SKIPS,
+                        help="times a waiting file may be overtaken by smaller ones")
+    parser.add_argument("--summary", help="summary JSON (default: <output>/text-removal-summary.json)")
+    parser.add_argument("--encode", action="store_true",
+                        help="also encode the first method's outputs with layer_encoder.py")
+    args = parser.parse_args(argv)
+
+    methods = args.methods or ['telea']
+
+    print("=" * 70)
+    print("Batch Text Removal")
+    print("=" * 70)
+
+    try:
+        budget = parse_size(args.memory)
+        paths = collect_inputs(args.inputs, args.manifest)
+    except (ValueError, OSError, KeyError) as e:
+        print(f"❌ ERROR: {e}")
+        return False
+    if not paths:
+        print("❌ ERROR: No input images")
+        return False
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    jobs, errors = plan_files(paths, args.output, methods, args.copies)
+    for error in errors:
+        print(f"  ❌ {error['input']}: {error['error']}")
+    workers = args.workers or os.cpu_count() or 1
+    peak = max((job['estimate'] for job in jobs), default=0)
+    print(f"\n✓ {len(jobs)} files, budget {budget / 2**20:.0f} MB, up to {workers} workers "
+          f"(largest file ~{peak / 2**20:.0f} MB)\n")
+    if peak > budget:
+        print("  ⚠️  Some files exceed the budget and will run one at a time\n")
+
+    start = time.perf_counter()
+    results = []
+    batch = run_batch(jobs, budget, workers, args.max_skips, methods=methods,
+                      radius=args.radius, save_mask=args.save_mask)
+    for done, (job, result) in enumerate(batch, 1):
+        if isinstance(result, Exception):
+            errors.append({'input': job['input'], 'error': str(result)})
+            print(f"  ❌ [{done}/{len(jobs)}] {job['input']}: {result}")
+            continue
+        results.append(result)
+        size = sum(o['bytes'] for o in result['outputs'])
+        print(f"  ✓ [{done}/{len(jobs)}] {os.path.basename(job['input'])}: "
+              f"{result['width']}x{result['height']}px, mask {result['coverage'] * 100:.2f}% "
+              f"({result['detector']}), {result['seconds']:.2f}s, {size / 1024:.0f} KB out")
+    elapsed = time.perf_counter() - start
+
+    summary_path = args.summary or os.path.join(
+        args.output or os.path.dirname(os.path.abspath(paths[0])), "text-removal-summary.json")
+
+    encoded = []
+    if args.encode and results:
+        print("\n📦 Encoding cleaned layers...")
+        for entry in encode_files([r['outputs'][0]['path'] for r in results], workers=workers):
+            encoded.append(entry)
+            print(f"  ✓ {report_line(entry)}")
+        manifest_path = os.path.join(os.path.dirname(os.path.abspath(summary_path)),
+                                     "picture-manifest.json")
+        write_manifest(encoded, manifest_path)
+        print(f"  ✓ Manifest: {manifest_path}")
+
+    with open(summary_path, 'w') as f:
+        json.dump({
+            'methods': methods,
+            'radius': args.radius,
+            'budget': budget,
+            'workers': workers,
+            'seconds': elapsed,
+            'files': results,
+            'encoded': encoded,
+            'errors': errors,
+        }, f, indent=2)
+    print(f"\n✓ Summary: {summary_path}")
+
+    print("\n" + "=" * 70)
+    if errors:
+        print(f"⚠️  {len(results)} files cleaned, {len(errors)} failed in {elapsed:.2f}s")
+    else:
+        print(f"✅ {len(results)} files cleaned in {elapsed:.2f}s")
+    print("=" * 70)
+    return not errors
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Single-buffer RGBA handoff between PIL, NumPy and OpenCV.
+
+The text-removal scripts each run Image.open().convert('RGBA'), np.array,
+an RGB slice, cvtColor RGB->BGR and BGR->GRAY, inpaint, cvtColor back,
+np.dstack with alpha, .astype(np.uint8) and Image.fromarray: about eight
+full-image allocations per output. LayerBuffer keeps one RGBA uint8 buffer
+and hands out channel views. Luminance is computed straight from the RGBA
+view, and inpainting reads the RGB view and writes into a preallocated
+RGBA output that already carries the original alpha. Inpainting treats
+channels independently, so the BGR swaps are not needed at all.
+
+--check-allocations runs both chains under tracemalloc and fails when the
+buffer path makes more full-image allocations than BUFFER_ALLOCATIONS.
+"""
+
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+import cv2
+from PIL import Image
+
+from layer_raw import is_layer_file
+from remove_text_pipeline import (
+    DEFAULT_RADIUS,
+    INPAINT_METHODS,
+    inpaint_rgba,
+    load_rgba,
+    luminance,
+    pixmap_array,
+    save_png,
+    select_text_mask,
+)
+
+CHANNELS = {'r': 0, 'g': 1, 'b': 2, 'a': 3}
+# Full-image arrays the buffer path may allocate: the decoded RGBA buffer,
+# luminance, the text mask and the output
+BUFFER_ALLOCATIONS = 4
+
+
+class LayerBuffer:
+    """One RGBA uint8 image with channel views and preallocated outputs"""
+
+    def __init__(self, rgba):
+        if rgba.ndim != 3 or rgba.shape[2] != 4 or rgba.dtype != np.uint8:
+            raise ValueError(f"Expected an (h, w, 4) uint8 array, got {rgba.shape} {rgba.dtype}")
+        self.rgba = rgba
+        self._gray = None
+
+    @classmethod
+    def from_file(cls, path):
+        """Decode once; RGBA files skip the convert() copy and RGBA .lraw files are mapped"""
+        if is_layer_file(path):
+            return cls(load_rgba(path))
+        with Image.open(path) as img:
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
+            return cls(np.asarray(img))
+
+    @classmethod
+    def from_pixmap(cls, pix):
+        """Zero-copy buffer over a rendered pixmap (rendered with alpha)"""
+        if pix.n != 4:
+            raise ValueError(f"Expected an RGBA pixmap, got {pix.n} channels")
+        return cls(pixmap_array(pix))
+
+    @property
+    def width(self):
+        return self.rgba.shape[1]
+
+    @property
+    def height(self):
+        return self.rgba.shape[0]
+
+    @property
+    def rgb(self):
+        return self.rgba[..., :3]
+
+    @property
+    def alpha(self):
+        return self.rgba[..., 3]
+
+    def channel(self, name):
+        """View of one channel: 'r', 'g', 'b' or 'a'"""
+        return self.rgba[..., CHANNELS[name]]
+
+    def luminance(self):
+        """Grayscale from the RGBA buffer (same weights as RGB->GRAY), computed once"""
+        if self._gray is None:
+            self._gray = luminance(self.rgba)
+        return self._gray
+
+    def text_mask(self):
+        """(mask, detector) using remove_text_refined.py's selection rule"""
+        return select_text_mask(self.luminance())
+
+    def new_output(self):
+        """Uninitialised RGBA output; inpaint() fills colour and alpha"""
+        return np.empty_like(self.rgba)
+
+    def inpaint(self, mask, radius=DEFAULT_RADIUS, method='telea', out=None):
+        """Inpaint into `out` (reusable across methods); returns it"""
+        return inpaint_rgba(self.rgba, mask, radius, method,
+                            out=self.new_output() if out is None else out)
+
+
+def legacy_chain(path, mask_fn, radius, flags):
+    """The scripts' original chain; returns its live intermediates"""
+    img = Image.open(path).convert('RGBA')
+    img_array = np.array(img)
+    img_rgb = img_array[:, :, :3]
+    img_alpha = img_array[:, :, 3]
+    img_cv = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
+    gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+    mask, _ = mask_fn(gray)
+    result = cv2.inpaint(img_cv, mask, radius, flags)
+    result_rgb = cv2.cvtColor(result, cv2.COLOR_BGR2RGB)
+    result_rgba = np.dstack([result_rgb, img_alpha])
+    final = result_rgba.astype(np.uint8)
+    Image.fromarray(final, 'RGBA')
+    return [img_array, img_cv, gray, mask, result, result_rgb, result_rgba, final]
+
+
+def buffer_chain(path, mask_fn, radius, method):
+    """Same work through LayerBuffer; returns its live intermediates"""
+    buf = LayerBuffer.from_file(path)
+    mask, _ = mask_fn(buf.luminance())
+    out = buf.inpaint(mask, radius, method)
+    Image.fromarray(out, 'RGBA')
+    return [buf.rgba, buf.luminance(), mask, out]
+
+
+def count_allocations(chain, frame_bytes, *args):
+    """(full-image allocations, peak traced bytes) of a chain under tracemalloc
+
+    Counts blocks of at least one single-channel frame that are still alive
+    when the chain returns (its intermediates are kept); the peak also
+    catches temporaries freed inside a step. Only NumPy/Python allocations
+    are traced, not PIL's or OpenCV's internal buffers.
+    """
+    tracemalloc.clear_traces()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    keep = chain(*args)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    after = tracemalloc.take_snapshot()
+    large = lambda snapshot: sum(1 for t in snapshot.traces if t.size >= frame_bytes)
+    count = large(after) - large(before)
+    del keep
+    return count, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove text through a single RGBA buffer")
+    parser.add_argument("input")
+    parser.add_argument("--output", "-o", help="output directory (default: next to the input)")
+    parser.add_argument("--method", action="append", dest="methods", choices=sorted(INPAINT_METHODS),
+                        help="inpainting algorithm (repeatable, default: telea)")
+    parser.add_argument("--radius", type=int, default=DEFAULT_RADIUS)
+    parser.add_argument("--check-allocations", action="store_true",
+                        help="compare full-image allocations against the original chain")
+    args = parser.parse_args(argv)
+
+    methods = args.methods or ['telea']
+    output_dir = args.output or os.path.dirname(os.path.abspath(args.input))
+
+    print("=" * 70)
+    print("Single-Buffer Text Removal")
+    print("=" * 70)
+
+    if not os.path.exists(args.input):
+        print(f"❌ ERROR: File not found: {args.input}")
+        return False
+
+    ok = True
+    if args.check_allocations and is_layer_file(args.input):
+        print("⚠️  --check-allocations measures the PNG decode chain; skipped for raw layers")
+    elif args.check_allocations:
+        with Image.open(args.input) as img:
+            width, height = img.size
+        frame = width * height
+        tracemalloc.start()
+        try:
+            legacy = count_allocations(legacy_chain, frame, args.input, select_text_mask,
+                                       args.radius, INPAINT_METHODS[methods[0]])
+            buffered = count_allocations(buffer_chain, frame, args.input, select_text_mask,
+                                         args.radius, methods[0])
+        finally:
+            tracemalloc.stop()
+        print(f"\nFull-image allocations ({width}x{height}px, {methods[0].upper()}):")
+        for label, (count, peak) in (("Original chain", legacy), ("LayerBuffer", buffered)):
+            print(f"  {label:<15} {count:>2} allocations, peak {peak / 2**20:7.1f} MB "
+                  f"({peak / frame:.1f} bytes/px)")
+        ok = buffered[0] <= BUFFER_ALLOCATIONS
+        if ok:
+            print(f"  ✓ Within {BUFFER_ALLOCATIONS} full-image allocations")
+        else:
+            print(f"  ❌ Expected at most {BUFFER_ALLOCATIONS} full-image allocations")
+
+    start = time.perf_counter()
+    buf = LayerBuffer.from_file(args.input)
+    mask, detector = buf.text_mask()
+    print(f"\n✓ Loaded: {buf.width}x{buf.height}px, mask "
+          f"{cv2.countNonZero(mask) / mask.size * 100:.2f}% ({detector})")
+
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(args.input))[0]
+    out = buf.new_output()
+    for method in methods:
+        suffix = "" if method == 'telea' else f"-{method}"
+        path = os.path.join(output_dir, f"{stem}-no-text{suffix}.png")
+        save_png(buf.inpaint(mask, args.radius, method, out=out), path)
+        print(f"  ✓ {method.upper()}: {path}")
+    print(f"  {time.perf_counter() - start:.2f}s")
+
+    print("\n" + "=" * 70)
+    print("✅ Complete!" if ok else "⚠️  Complete with extra allocations")
+    print("=" * 70)
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
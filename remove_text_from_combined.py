@@ -104,7 +104,7 @@ def remove_text_high_quality():
         
         # Save cleaned image
         output_file = os.path.join(output_dir, "special-one-background-no-text.png")
-        result_img.save(output_file, 'PNG', compress_level=0)  # No compression for max quality
+        result_img.save(output_file, 'PNG')  # PNG is lossless at any compression level
         print(f"  ✓ Saved cleaned image: {output_file}")
         print(f"    Size: {result_img.size[0]}x{result_img.size[1]}px")
         
@@ -116,7 +116,7 @@ def remove_text_high_quality():
         result_ns_img = Image.fromarray(result_ns_array.astype(np.uint8))
         
         output_file_ns = os.path.join(output_dir, "special-one-background-no-text-ns.png")
-        result_ns_img.save(output_file_ns, 'PNG', compress_level=0)
+        result_ns_img.save(output_file_ns, 'PNG')
         print(f"  ✓ Saved NS version: {output_file_ns}")
         
         print("\n" + "=" * 70)
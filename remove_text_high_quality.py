@@ -88,7 +88,7 @@ def remove_text_high_quality():
         
         # Save cleaned image
         bg_clean_path = os.path.join(input_dir, "special-one-background-clean.png")
-        img_bg_clean.save(bg_clean_path, 'PNG', compress_level=0)  # No compression for quality
+        img_bg_clean.save(bg_clean_path, 'PNG')  # PNG is lossless at any compression level
         print(f"  ✓ Saved: {bg_clean_path}")
         
     except Exception as e:
@@ -117,7 +117,7 @@ def remove_text_high_quality():
             print("  ⚠️  Using basic processing")
         
         texture_clean_path = os.path.join(input_dir, "special-one-texture-clean.png")
-        img_texture_clean.save(texture_clean_path, 'PNG', compress_level=0)
+        img_texture_clean.save(texture_clean_path, 'PNG')
         print(f"  ✓ Saved: {texture_clean_path}")
         
     except Exception as e:
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Text-mask search on a downscaled proxy.
+
+remove_text_refined.py builds four full-resolution masks and keeps the first
+whose coverage is between 1% and 15%. Here a configurable grid of detectors
+and parameters is evaluated on a small proxy of the image, in parallel
+across cores; the parent scores every candidate with a pluggable objective
+and only the winner is run (and refined) at full resolution.
+
+Grid entries are [detector, {param: value or [values]}]; lists expand into
+one candidate per combination, e.g.
+    --grid '[["threshold", {"t": [250, 245, 240, 230, 220]}],
+             ["adaptive", {"block": [11, 21], "c": [2, 5]}]]'
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import cv2
+
+from remove_text_pipeline import (
+    COVERAGE_RANGE,
+    DEFAULT_RADIUS,
+    INPAINT_METHODS,
+    inpaint_rgba,
+    load_rgba,
+    refine_mask,
+    save_png,
+)
+
+DEFAULT_INPUT_DIR = "/Users/sachahurley/spotify-music-player/public/images/special-one-layers"
+DEFAULT_INPUT = os.path.join(DEFAULT_INPUT_DIR, "special-one-all-layers-reference.png")
+DEFAULT_PROXY_SIZE = 512
+
+# remove_text_refined.py's four detectors, in its order
+DEFAULT_GRID = [
+    ["threshold", {"t": [250, 240, 220]}],
+    ["adaptive", {"block": 11, "c": 2}],
+]
+
+
+def _odd(value):
+    value = max(3, int(round(value)))
+    return value if value % 2 else value + 1
+
+
+def detect_threshold(gray, scale, t):
+    """Bright text: pixels above t"""
+    _, mask = cv2.threshold(gray, t, 255, cv2.THRESH_BINARY)
+    return mask
+
+
+def detect_adaptive(gray, scale, block=11, c=2):
+    """Pixels brighter than their neighbourhood (block is in full-resolution pixels)"""
+    mask = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                 cv2.THRESH_BINARY_INV, _odd(block * scale), c)
+    return 255 - mask
+
+
+def detect_tophat(gray, scale, size=15, t=40):
+    """Small bright structures: white top-hat of size px (full resolution) above t"""
+    k = _odd(size * scale)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (k, k))
+    tophat = cv2.morphologyEx(gray, cv2.MORPH_TOPHAT, kernel)
+    _, mask = cv2.threshold(tophat, t, 255, cv2.THRESH_BINARY)
+    return mask
+
+
+DETECTORS = {
+    'threshold': detect_threshold,
+    'adaptive': detect_adaptive,
+    'tophat': detect_tophat,
+}
+
+
+def expand_grid(grid):
+    """List of (detector, params) candidates from grid entries"""
+    candidates = []
+    for name, params in grid:
+        if name not in DETECTORS:
+            raise ValueError(f"Unknown detector {name!r} (known: {', '.join(sorted(DETECTORS))})")
+        keys = sorted(params)
+        values = [v if isinstance(v, list) else [v] for v in (params[k] for k in keys)]
+        for combo in itertools.product(*values):
+            candidates.append((name, dict(zip(keys, combo))))
+    return candidates
+
+
+def candidate_label(name, params):
+    return f"{name}(" + ", ".join(f"{k}={v}" for k, v in sorted(params.items())) + ")"
+
+
+def run_detector(gray, scale, name, params):
+    return DETECTORS[name](gray, scale, **params)
+
+
+# Objectives: score(mask, gray, rank, count) -> float, higher wins. Masks are
+# 0/255 proxy masks; rank is the candidate's position in the grid.
+
+def coverage_objective(mask, gray, rank, count):
+    """remove_text_refined.py's rule: first candidate in the coverage range, else the most selective"""
+    coverage = np.count_nonzero(mask) / mask.size
+    lo, hi = COVERAGE_RANGE
+    if lo <= coverage <= hi:
+        return 2.0 - rank / count
+    return 1.0 - coverage
+
+
+def contrast_objective(mask, gray, rank, count):
+    """Brightness gap between masked and unmasked pixels, within the coverage range"""
+    selected = mask > 0
+    coverage = np.count_nonzero(selected) / mask.size
+    lo, hi = COVERAGE_RANGE
+    if not lo <= coverage <= hi:
+        return -abs(coverage - (lo + hi) / 2)
+    return float(gray[selected].mean() - gray[~selected].mean()) / 255.0
+
+
+OBJECTIVES = {
+    'coverage': coverage_objective,
+    'contrast': contrast_objective,
+}
+
+
+def make_proxy(gray, proxy_size):
+    """Area-downscaled copy with its long side at most proxy_size; returns (proxy, scale)"""
+    scale = min(1.0, proxy_size / max(gray.shape))
+    if scale == 1.0:
+        return gray, 1.0
+    size = (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale)))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA), scale
+
+
+_proxy = None
+_scale = None
+
+
+def _init_worker(proxy, scale):
+    global _proxy, _scale
+    _proxy, _scale = proxy, scale
+    cv2.setNumThreads(1)
+
+
+def _detect_job(candidate):
+    name, params = candidate
+    mask = run_detector(_proxy, _scale, name, params)
+    return np.packbits(mask > 0)
+
+
+def search_mask(gray, grid=DEFAULT_GRID, objective='coverage', proxy_size=DEFAULT_PROXY_SIZE,
+                workers=None):
+    """Pick the best candidate on a proxy; returns (winner, scores sorted best first)
+
+    winner is (detector, params); scores are (score, label, proxy coverage).
+    """
+    candidates = expand_grid(grid)
+    proxy, scale = make_proxy(gray, proxy_size)
+    score = OBJECTIVES[objective]
+    workers = workers or os.cpu_count() or 1
+
+    if workers > 1 and len(candidates) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(candidates)), initializer=_init_worker,
+                                 initargs=(proxy, scale)) as pool:
+            packed = list(pool.map(_detect_job, candidates))
+        masks = [np.unpackbits(p, count=proxy.size).reshape(proxy.shape) * np.uint8(255)
+                 for p in packed]
+    else:
+        masks = [run_detector(proxy, scale, name, params) for name, params in candidates]
+
+    results = []
+    for rank, ((name, params), mask) in enumerate(zip(candidates, masks)):
+        results.append((score(mask, proxy, rank, len(candidates)), rank,
+                        candidate_label(name, params), np.count_nonzero(mask) / mask.size))
+    results.sort(key=lambda r: (-r[0], r[1]))
+    winner = candidates[results[0][1]]
+    return winner, [(s, label, coverage) for s, _, label, coverage in results]
+
+
+def load_grid(spec):
+    """Grid from a JSON string or a JSON file path"""
+    if spec is None:
+        return DEFAULT_GRID
+    if os.path.exists(spec):
+        with open(spec) as f:
+            return json.load(f)
+    return json.loads(spec)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search text-mask detectors on a proxy, then inpaint")
+    parser.add_argument("input", nargs="?", default=DEFAULT_INPUT)
+    parser.add_argument("--output", "-o", help="output directory (default: next to the input)")
+    parser.add_argument("--grid", help="JSON grid (string or file) of [detector, params] entries")
+    parser.add_argument("--objective", choices=sorted(OBJECTIVES), default='coverage')
+    parser.add_argument("--proxy-size", type=int, default=DEFAULT_PROXY_SIZE,
+                        help="long side of the search proxy in pixels")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--method", action="append", dest="methods", choices=sorted(INPAINT_METHODS),
+                        help="inpainting algorithm (repeatable, default: telea)")
+    parser.add_argument("--radius", type=int, default=DEFAULT_RADIUS)
+    parser.add_argument("--save-mask", action="store_true")
+    parser.add_argument("--prefix", default="special-one-background")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output or os.path.dirname(os.path.abspath(args.input))
+    methods = args.methods or ['telea']
+
+    print("=" * 70)
+    print("Text Mask Search")
+    print("=" * 70)
+
+    if not os.path.exists(args.input):
+        print(f"❌ ERROR: File not found: {args.input}")
+        return False
+    try:
+        grid = load_grid(args.grid)
+        expand_grid(grid)
+    except (ValueError, TypeError) as e:
+        print(f"❌ ERROR: Invalid grid: {e}")
+        return False
+
+    rgba = load_rgba(args.input)
+    gray = cv2.cvtColor(np.ascontiguousarray(rgba[..., :3]), cv2.COLOR_RGB2GRAY)
+    print(f"\n✓ Loaded: {rgba.shape[1]}x{rgba.shape[0]}px\n")
+
+    start = time.perf_counter()
+    (name, params), scores = search_mask(gray, grid, args.objective, args.proxy_size, args.workers)
+    print(f"Searched {len(scores)} candidates ({args.objective}) in {time.perf_counter() - start:.2f}s:")
+    for score, label, coverage in scores:
+        print(f"  {score:7.3f}  {label}: {coverage * 100:.2f}%")
+
+    start = time.perf_counter()
+    mask = refine_mask(run_detector(gray, 1.0, name, params))
+    coverage = np.count_nonzero(mask) / mask.size
+    print(f"\n✓ Using: {candidate_label(name, params)} "
+          f"(full resolution {coverage * 100:.2f}%, {time.perf_counter() - start:.2f}s)")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if args.save_mask:
+        mask_path = os.path.join(output_dir, "text_mask_search.png")
+        cv2.imwrite(mask_path, mask)
+        print(f"  ✓ Saved mask: {mask_path}")
+
+    print("\n🎨 Removing text...")
+    for method in methods:
+        suffix = "" if method == 'telea' else f"-{method}"
+        path = os.path.join(output_dir, f"{args.prefix}-no-text{suffix}.png")
+        save_png(inpaint_rgba(rgba, mask, args.radius, method), path)
+        print(f"  ✓ {method.upper()}: {path}")
+
+    print("\n" + "=" * 70)
+    print("✅ Complete!")
+    print("=" * 70)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+In-process extraction -> text removal pipeline.
+
+A rendered fitz.Pixmap is exposed as a NumPy view over pix.samples_mv and
+handed straight to text detection and inpainting, instead of saving a PNG,
+reopening it with Image.open(...).convert('RGBA') and copying it with
+np.array(). PNGs are only written for the final artifacts.
+"""
+
+import sys
+import os
+import time
+import argparse
+
+import numpy as np
+import cv2
+from PIL import Image
+
+from extract_layers_engine import (
+    DEFAULT_AI_FILE,
+    DEFAULT_OUTPUT_DIR,
+    DEFAULT_PAGE,
+    DEFAULT_ZOOM,
+    layer_filename,
+    open_renderer,
+)
+from layer_raw import is_layer_file, open_layer, write_layer
+from remove_text_roi import inpaint_roi
+
+INPAINT_METHODS = {'telea': cv2.INPAINT_TELEA, 'ns': cv2.INPAINT_NS}
+DEFAULT_RADIUS = 5
+
+# remove_text_refined.py's candidate masks, tried in this order
+THRESHOLDS = (250, 240, 220)
+COVERAGE_RANGE = (0.01, 0.15)
+
+
+class PixmapArray(np.ndarray):
+    """ndarray view of a pixmap's samples that keeps the pixmap alive
+
+    PyMuPDF releases samples_mv when the Pixmap is destroyed, so the view
+    (and every slice taken from it, through .base) holds a reference.
+    """
+
+    def __array_finalize__(self, obj):
+        self._pixmap = getattr(obj, '_pixmap', None)
+
+
+def pixmap_array(pix):
+    """Zero-copy (height, width, channels) uint8 view of a pixmap"""
+    base = np.ndarray(
+        (pix.height, pix.width, pix.n),
+        dtype=np.uint8,
+        buffer=pix.samples_mv,
+        strides=(pix.stride, pix.n, 1),
+    )
+    view = base.view(PixmapArray)
+    view._pixmap = pix
+    return view
+
+
+def load_rgba(path):
+    """RGBA array from an image file; 4-channel .lraw layer files are memory-mapped, not read"""
+    if is_layer_file(path):
+        pixels = open_layer(path)
+        if pixels.shape[2] == 4:
+            return pixels
+        rgb = pixels if pixels.shape[2] == 3 else np.repeat(pixels, 3, axis=2)
+        return np.dstack([rgb, np.full(pixels.shape[:2], 255, dtype=np.uint8)])
+    return np.asarray(Image.open(path).convert('RGBA'))
+
+
+def candidate_masks(gray):
+    """(name, mask) candidates used by remove_text_refined.py"""
+    for t in THRESHOLDS:
+        _, mask = cv2.threshold(gray, t, 255, cv2.THRESH_BINARY)
+        yield f"threshold {t}", mask
+    adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                     cv2.THRESH_BINARY_INV, 11, 2)
+    yield "adaptive", 255 - adaptive
+
+
+def refine_mask(mask):
+    """Close/open away specks, then dilate for full glyph coverage"""
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    refined = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    refined = cv2.morphologyEx(refined, cv2.MORPH_OPEN, kernel)
+    return cv2.dilate(refined, kernel, iterations=2)
+
+
+def luminance(rgba, out=None):
+    """Grayscale straight from an RGB(A) array, without an RGB copy"""
+    code = cv2.COLOR_RGBA2GRAY if rgba.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+    return cv2.cvtColor(rgba, code, dst=out)
+
+
+def select_text_mask(gray):
+    """Text mask for a grayscale image using remove_text_refined.py's selection rule
+
+    Returns (mask, name of the chosen detector).
+    """
+    total = gray.size
+    lo, hi = COVERAGE_RANGE
+    fallback = None
+    for name, mask in candidate_masks(gray):
+        coverage = cv2.countNonZero(mask) / total
+        if lo <= coverage <= hi:
+            return refine_mask(mask), name
+        if fallback is None or coverage < fallback[0]:
+            fallback = (coverage, name, mask)
+    _, name, mask = fallback
+    return refine_mask(mask), name
+
+
+def detect_text_shapes(gray):
+    """remove_text_shape_based.py's text mask: filled Canny outlines that are text-sized and wide"""
+    edges = cv2.Canny(gray, 50, 150)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    mask = np.zeros(gray.shape, dtype=np.uint8)
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        area = cv2.contourArea(contour)
+        if 100 < area < 50000 and h > 0 and 1.5 < w / h < 20 and w > h * 1.2:
+            cv2.drawContours(mask, [contour], -1, 255, -1)
+    return mask
+
+
+def detect_text_mask(rgba):
+    """Text mask for an RGBA array; returns (mask, name of the chosen detector)"""
+    return select_text_mask(luminance(rgba))
+
+
+def inpaint_rgba(rgba, mask, radius=DEFAULT_RADIUS, method='telea', out=None):
+    """Inpaint the RGB channels under `mask` into an RGBA `out` carrying the original alpha"""
+    if out is None:
+        out = np.empty(rgba.shape[:2] + (4,), dtype=np.uint8)
+    out[..., 3] = rgba[..., 3] if rgba.shape[2] == 4 else 255
+    # Inpainting treats channels independently, so no RGB<->BGR swap is needed.
+    # Only padded regions around the mask are processed (same result, less
+    # work), reading the RGB view and writing straight into out's RGB view.
+    inpaint_roi(rgba[..., :3], mask, radius, INPAINT_METHODS[method], out=out[..., :3])
+    return out
+
+
+def save_png(array, path):
+    """Write a final artifact (a raw layer file instead for .lraw paths)"""
+    if is_layer_file(path):
+        write_layer(path, array)
+        return
+    mode = {1: 'L', 3: 'RGB', 4: 'RGBA'}[array.shape[2] if array.ndim == 3 else 1]
+    Image.fromarray(np.ascontiguousarray(array), mode).save(path, 'PNG')
+
+
+def remove_text(rgba, radius=DEFAULT_RADIUS, methods=('telea',), mask=None):
+    """Run detection (unless a mask is given) and inpainting on an in-memory layer"""
+    detector = "given"
+    if mask is None:
+        mask, detector = detect_text_mask(rgba)
+    results = {m: inpaint_rgba(rgba, mask, radius, m) for m in methods}
+    return mask, detector, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render layers and remove text without intermediate PNGs")
+    parser.add_argument("source", nargs="?", default=DEFAULT_AI_FILE)
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--page", type=int, default=DEFAULT_PAGE, help="1-based artboard/page number")
+    parser.add_argument("--layer", "-l", action="append", dest="layers",
+                        help="layer to clean (repeatable, default: all layers combined)")
+    parser.add_argument("--zoom", type=float, default=DEFAULT_ZOOM)
+    parser.add_argument("--method", action="append", dest="methods", choices=sorted(INPAINT_METHODS),
+                        help="inpainting algorithm (repeatable, default: telea)")
+    parser.add_argument("--radius", type=int, default=DEFAULT_RADIUS)
+    parser.add_argument("--save-mask", action="store_true")
+    parser.add_argument("--prefix", default="special-one")
+    args = parser.parse_args(argv)
+
+    methods = args.methods or ['telea']
+    targets = [[layer] for layer in args.layers] if args.layers else [None]
+
+    print("=" * 70)
+    print("In-Process Text Removal Pipeline")
+    print("=" * 70)
+    print(f"\nSource: {args.source}")
+    print(f"Output: {args.output}\n")
+
+    if not os.path.exists(args.source):
+        print(f"❌ ERROR: File not found: {args.source}")
+        return False
+
+    os.makedirs(args.output, exist_ok=True)
+
+    with open_renderer(args.source) as renderer:
+        if not 1 <= args.page <= renderer.page_count:
+            print(f"❌ ERROR: Page {args.page} out of range (1-{renderer.page_count})")
+            return False
+        for layers in targets:
+            start = time.perf_counter()
+            try:
+                pix = renderer.render(args.page - 1, layers, zoom=args.zoom)
+            except KeyError as e:
+                print(f"  ❌ {e.args[0]}")
+                return False
+            rgba = pixmap_array(pix)
+            mask, detector, results = remove_text(rgba, args.radius, methods)
+
+            stem, _ = os.path.splitext(layer_filename(args.prefix, layers and layers[0]))
+            label = layers[0].upper() if layers else "ALL LAYERS"
+            coverage = cv2.countNonZero(mask) / mask.size * 100
+            print(f"  {label}: {pix.width}x{pix.height}px, mask {coverage:.2f}% ({detector})")
+            for method, result in results.items():
+                suffix = "" if method == 'telea' else f"-{method}"
+                path = os.path.join(args.output, f"{stem}-no-text{suffix}.png")
+                save_png(result, path)
+                print(f"    ✓ {method.upper()}: {path}")
+            if args.save_mask:
+                path = os.path.join(args.output, f"{stem}-text-mask.png")
+                cv2.imwrite(path, mask)
+                print(f"    ✓ Mask: {path}")
+            print(f"    {time.perf_counter() - start:.2f}s")
+
+    print("\n" + "=" * 70)
+    print("✅ Complete!")
+    print("=" * 70)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Coarse-to-fine pyramid inpainting for large masks.
+
+remove_text_from_combined.py dilates its mask 3x with a 5x5 kernel, and
+TELEA/NS are slow and smeary over masked areas that wide. Here the hole is
+filled at 1/4 scale first; each finer level (1/2, then full resolution)
+takes the upsampled fill as its estimate for the hole and re-inpaints only
+a thin band along the mask boundary, where the estimate meets real pixels.
+Inpaint work at full resolution follows the boundary length instead of the
+mask area.
+"""
+
+import sys
+import os
+import time
+import argparse
+
+import numpy as np
+import cv2
+
+from remove_text_roi import inpaint_roi
+
+DEFAULT_SCALES = (4, 2)  # downscale factors, coarsest first
+
+
+def boundary_band(mask, width):
+    """Masked pixels within `width` px of an unmasked pixel"""
+    inside = (mask > 0).astype(np.uint8)
+    distance = cv2.distanceTransform(inside, cv2.DIST_L2, 3)
+    return ((inside > 0) & (distance <= width)).astype(np.uint8) * np.uint8(255)
+
+
+def downscale(image, mask, factor):
+    """Area-averaged image and max-pooled mask (any masked pixel masks the block)"""
+    h, w = mask.shape
+    size = (max(1, -(-w // factor)), max(1, -(-h // factor)))
+    small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    ph, pw = size[1] * factor, size[0] * factor
+    padded = np.zeros((ph, pw), dtype=bool)
+    padded[:h, :w] = mask > 0
+    small_mask = padded.reshape(size[1], factor, size[0], factor).any(axis=(1, 3))
+    return small, small_mask.astype(np.uint8) * np.uint8(255)
+
+
+def inpaint_pyramid(image, mask, radius=5, flags=cv2.INPAINT_TELEA, scales=DEFAULT_SCALES,
+                    band=None):
+    """Coarse-to-fine inpaint of an 8-bit 1/3-channel image; returns (result, per-level stats)
+
+    `band` is the refined boundary width in level pixels; by default it is
+    the radius plus the step from the coarser level, which covers the
+    pixels the coarser level's max-pooled mask hid from it.
+    """
+    factors = list(scales) + [1]
+    levels = [downscale(image, mask, f) for f in scales]
+    levels.append((image, (mask > 0).astype(np.uint8) * np.uint8(255)))
+    stats = []
+
+    estimate = None
+    for i, ((level_image, level_mask), factor) in enumerate(zip(levels, factors)):
+        start = time.perf_counter()
+        if estimate is None:
+            # Coarsest level: fill the whole hole
+            work_mask = level_mask
+            seeded = level_image
+        else:
+            up = cv2.resize(estimate, (level_mask.shape[1], level_mask.shape[0]),
+                            interpolation=cv2.INTER_LINEAR)
+            seeded = level_image.copy()
+            hole = level_mask > 0
+            seeded[hole] = up[hole]
+            step = -(-factors[i - 1] // factor)
+            work_mask = boundary_band(level_mask, radius + step if band is None else band)
+        estimate, _ = inpaint_roi(seeded, work_mask, radius, flags)
+        stats.append({
+            'scale': f"1/{factor}" if factor > 1 else "1",
+            'size': [level_mask.shape[1], level_mask.shape[0]],
+            'masked_pixels': int(np.count_nonzero(level_mask)),
+            'inpainted_pixels': int(np.count_nonzero(work_mask)),
+            'seconds': time.perf_counter() - start,
+        })
+    return estimate, stats
+
+
+def combined_text_mask(gray):
+    """remove_text_from_combined.py's mask: bright + morphology + edges, dilated 5x5 x3"""
+    _, mask_white = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    morph = cv2.morphologyEx(mask_white, cv2.MORPH_CLOSE, kernel)
+    morph = cv2.morphologyEx(morph, cv2.MORPH_OPEN, kernel)
+    edges = cv2.dilate(cv2.Canny(gray, 50, 150), kernel, iterations=2)
+    combined = cv2.bitwise_or(cv2.bitwise_or(mask_white, morph), edges)
+    kernel_large = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+    return cv2.dilate(combined, kernel_large, iterations=3)
+
+
+def main(argv=None):
+    from remove_text_pipeline import DEFAULT_RADIUS, INPAINT_METHODS, load_rgba, save_png
+
+    parser = argparse.ArgumentParser(description="Coarse-to-fine pyramid inpainting")
+    parser.add_argument("input")
+    parser.add_argument("--mask", help="mask image (default: remove_text_from_combined.py's detection)")
+    parser.add_argument("--output", "-o", help="output PNG (default: <input>-no-text.png)")
+    parser.add_argument("--method", choices=sorted(INPAINT_METHODS), default='telea')
+    parser.add_argument("--radius", type=int, default=DEFAULT_RADIUS)
+    parser.add_argument("--scale", type=int, action="append", dest="scales",
+                        help="downscale factor per level, coarsest first (default: 4, 2)")
+    parser.add_argument("--band", type=int, help="boundary band refined per level (default: radius + level step)")
+    parser.add_argument("--verify", action="store_true",
+                        help="also run the single-pass inpaint and compare timing")
+    args = parser.parse_args(argv)
+
+    scales = tuple(sorted(args.scales, reverse=True)) if args.scales else DEFAULT_SCALES
+
+    print("=" * 70)
+    print("Pyramid Inpainting")
+    print("=" * 70)
+
+    for path in filter(None, (args.input, args.mask)):
+        if not os.path.exists(path):
+            print(f"❌ ERROR: File not found: {path}")
+            return False
+    if any(s < 2 for s in scales):
+        print("❌ ERROR: Scale factors must be 2 or more")
+        return False
+
+    rgba = load_rgba(args.input)
+    rgb = np.ascontiguousarray(rgba[..., :3])
+    if args.mask:
+        mask = cv2.imread(args.mask, cv2.IMREAD_GRAYSCALE)
+        if mask.shape != rgba.shape[:2]:
+            print(f"❌ ERROR: Mask is {mask.shape[1]}x{mask.shape[0]}, image is "
+                  f"{rgba.shape[1]}x{rgba.shape[0]}")
+            return False
+    else:
+        mask = combined_text_mask(cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY))
+        print("\n✓ Detected mask (combined bright/morphology/edges)")
+
+    flags = INPAINT_METHODS[args.method]
+    print(f"\n{rgb.shape[1]}x{rgb.shape[0]}px, mask {np.count_nonzero(mask) / mask.size * 100:.2f}%")
+    start = time.perf_counter()
+    filled, stats = inpaint_pyramid(rgb, mask, args.radius, flags, scales, args.band)
+    elapsed = time.perf_counter() - start
+    for level in stats:
+        w, h = level['size']
+        print(f"  {level['scale']:>4} ({w}x{h}): inpainted {level['inpainted_pixels']:,} of "
+              f"{level['masked_pixels']:,} masked px in {level['seconds']:.2f}s")
+    print(f"  Pyramid ({args.method.upper()}): {elapsed:.2f}s")
+
+    if args.verify:
+        start = time.perf_counter()
+        single = cv2.inpaint(rgb, mask, args.radius, flags)
+        single_time = time.perf_counter() - start
+        sel = mask > 0
+        delta = np.abs(single.astype(np.int16) - filled.astype(np.int16))[sel]
+        print(f"  Single pass: {single_time:.2f}s ({single_time / max(elapsed, 1e-9):.1f}x the pyramid)")
+        if delta.size:
+            print(f"  inside mask vs single pass: mean delta {float(delta.mean()):.2f}, "
+                  f"max {int(delta.max())}")
+
+    output = args.output or f"{os.path.splitext(args.input)[0]}-no-text.png"
+    save_png(np.dstack([filled, rgba[..., 3]]), output)
+    print(f"\n✓ Saved: {output}")
+
+    print("\n" + "=" * 70)
+    print("✅ Complete!")
+    print("=" * 70)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -115,7 +115,7 @@ def remove_text_refined():
     result_telea_img = Image.fromarray(result_telea.astype(np.uint8))
     
     output_telea = os.path.join(input_dir, "special-one-background-no-text.png")
-    result_telea_img.save(output_telea, 'PNG', compress_level=0)
+    result_telea_img.save(output_telea, 'PNG')
     print(f"  ✓ TELEA: {output_telea}")
     
     # NS (higher quality)
@@ -125,7 +125,7 @@ def remove_text_refined():
     result_ns_img = Image.fromarray(result_ns.astype(np.uint8))
     
     output_ns = os.path.join(input_dir, "special-one-background-no-text-ns.png")
-    result_ns_img.save(output_ns, 'PNG', compress_level=0)
+    result_ns_img.save(output_ns, 'PNG')
     print(f"  ✓ NS: {output_ns}")
     
     print("\n" + "=" * 70)
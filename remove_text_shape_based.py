@@ -116,7 +116,7 @@ def remove_text_shape_based():
     result_img = Image.fromarray(result.astype(np.uint8))
     
     output_file = os.path.join(input_dir, "special-one-background-no-text.png")
-    result_img.save(output_file, 'PNG', compress_level=0)
+    result_img.save(output_file, 'PNG')
     print(f"  ✓ Saved: {output_file}")
     
     print("\n" + "=" * 70)